@@ -0,0 +1,14 @@
+from kurt3.batch import run_batch
+
+
+def add_sprite(project):
+    # Transforms run in worker processes, so must be defined at the top level of a module
+    project.create_sprite("Sprite2")
+
+def main():
+    for result in run_batch(["../assets/Blank Project.sb3"], add_sprite, "../out/batch"):
+        if not result.ok:
+            print(f"{result.input_path} failed:\n{result.error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+import tracemalloc
+
+from kurt3.block_table import BLOCK_STORAGE
+
+
+def block_dicts(n):
+    # A single long script of "move (10) steps" blocks, as it would be parsed from project.json
+    blocks = {}
+    for i in range(n):
+        blocks[f"block{i}"] = {
+            "opcode": "motion_movesteps",
+            "next": f"block{i + 1}" if i + 1 < n else None,
+            "parent": f"block{i - 1}" if i else None,
+            "inputs": {"STEPS": [1, [4, "10"]]},
+            "fields": {},
+            "shadow": False,
+            "topLevel": i == 0,
+            **({"x": 0, "y": 0} if i == 0 else {}),
+        }
+    return blocks
+
+def measure(storage, n):
+    # Timed and measured separately, as tracing memory slows everything down
+    dicts = block_dicts(n)
+    start = time.perf_counter()
+    manager = storage(dicts)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moves = manager.ids_by_opcode("motion_movesteps")
+    walked = sum(1 for id in manager.walk_ids("block0"))
+    queried = time.perf_counter() - start
+
+    dicts = block_dicts(n)
+    tracemalloc.start()
+    manager = storage(dicts)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{storage.__name__}: {len(manager)} blocks: {elapsed:.2f}s to build, {size / n:.0f} bytes per block, "
+        f"{queried:.2f}s to find {len(moves)} by opcode and walk {walked}")
+
+def main(n=100_000):
+    for storage in BLOCK_STORAGE.values():
+        measure(storage, n)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import copy
+import os
+import struct
+import time
+import zipfile
+import zlib
+
+# Offsets into a zip local file header; see section 4.3.7 of the PKWARE APPNOTE.
+_LOCAL_HEADER_LENGTHS = struct.Struct("<HH")
+_LOCAL_HEADER_LENGTHS_OFFSET = 26
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def read_raw_member(source: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """
+    Return the still-compressed bytes of a member of the `source` archive, exactly as they are stored.
+    """
+    # Hold the archive's own lock, as other threads may be reading members through it at the same time
+    with source._lock:
+        fp = source.fp
+        fp.seek(info.header_offset)
+        header = fp.read(zipfile.sizeFileHeader)
+        if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local file header for archive member {info.filename}.")
+
+        name_length, extra_length = _LOCAL_HEADER_LENGTHS.unpack_from(header, _LOCAL_HEADER_LENGTHS_OFFSET)
+        fp.seek(name_length + extra_length, 1)
+        return fp.read(info.compress_size)
+
+
+def write_raw_member(destination: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes) -> None:
+    """
+    Write an already-compressed member into the `destination` archive. `info` must describe `data`
+    fully (compression method, CRC and both sizes), as nothing is recomputed here.
+    """
+    info = copy.copy(info)
+    # The sizes are known up front, so no data descriptor needs to trail the member.
+    info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    info.header_offset = destination.fp.tell()
+
+    destination.fp.write(info.FileHeader())
+    destination.fp.write(data)
+    destination.start_dir = destination.fp.tell()
+
+    destination.filelist.append(info)
+    destination.NameToInfo[info.filename] = info
+    destination._didModify = True
+
+
+def copy_member_raw(source: zipfile.ZipFile, destination: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """
+    Copy a member from `source` into `destination` without decompressing or recompressing it.
+    """
+    write_raw_member(destination, info, read_raw_member(source, info))
+
+
+class CompressionPolicy:
+    """
+    Decides how each member of a saved project is compressed, by file extension. Each extension maps to a
+    `(method, level)` pair, where the method is `zipfile.ZIP_STORED` or `zipfile.ZIP_DEFLATED` and the level
+    is a zlib compression level (ignored when storing). Extensions that are not listed use `default`.
+    """
+
+    def __init__(self, methods: dict[str, tuple[int, int]] = None, default: tuple[int, int] = (zipfile.ZIP_DEFLATED, 6)) -> None:
+        self.__methods = {ext.lstrip(".").lower(): CompressionPolicy._check(m) for ext, m in (methods or {}).items()}
+        self.__default = CompressionPolicy._check(default)
+
+    @staticmethod
+    def _check(method: tuple[int, int]) -> tuple[int, int]:
+        compress_type, level = method
+        if compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ValueError(f"Compression method must be ZIP_STORED or ZIP_DEFLATED, but {compress_type} was received.")
+        if compress_type == zipfile.ZIP_DEFLATED and not (-1 <= level <= 9):
+            raise ValueError(f"Deflate compression level ({level}) must be between -1 and 9 inclusive.")
+        return compress_type, level
+
+    def for_member(self, name: str) -> tuple[int, int]:
+        """
+        Return the `(method, level)` to compress the archive member called `name` with.
+        """
+        return self.__methods.get(os.path.splitext(name)[1][1:].lower(), self.__default)
+
+# Formats that are already compressed gain next to nothing from being deflated again, so are stored as they are.
+DEFAULT_COMPRESSION = CompressionPolicy({
+    "png": (zipfile.ZIP_STORED, 0),
+    "jpg": (zipfile.ZIP_STORED, 0),
+    "jpeg": (zipfile.ZIP_STORED, 0),
+    "gif": (zipfile.ZIP_STORED, 0),
+    "mp3": (zipfile.ZIP_STORED, 0),
+})
+NO_COMPRESSION = CompressionPolicy(default=(zipfile.ZIP_STORED, 0))
+
+# The earliest timestamp a zip file can hold, given to members written in deterministic mode
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# The system zipfile records members as made on (Unix) everywhere but Windows, given to every member in deterministic mode
+FIXED_CREATE_SYSTEM = 3
+
+
+def compress_member(name: str, data: bytes, compress_type: int, level: int, date_time: tuple = None) -> tuple[zipfile.ZipInfo, bytes]:
+    """
+    Compress `data` as an archive member called `name`, returning its `ZipInfo` and compressed bytes, ready
+    for `write_raw_member`. As zlib releases the GIL, several members can be compressed in parallel threads.
+    The member is timestamped with the current time unless a `date_time` is given.
+    """
+    info = zipfile.ZipInfo(name, date_time=date_time or time.localtime(time.time())[:6])
+    info.compress_type = compress_type
+    info.external_attr = 0o600 << 16 # The same permissions ZipFile.writestr gives
+    info.file_size = len(data)
+    info.CRC = zlib.crc32(data)
+
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = compressor.compress(data) + compressor.flush()
+    info.compress_size = len(data)
+    return info, data
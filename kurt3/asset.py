@@ -1,12 +1,26 @@
+from __future__ import annotations
+import hashlib
+import json as JSON
+import os
+import uuid
 from typing import NamedTuple
 
+HASH_CHUNK_SIZE = 1 << 20 # Assets are hashed 1MiB at a time, however large they are
+
 
 class Asset:
+    __slots__ = ("__asset_id", "__name", "__data_format", "__md5_ext", "_manager")
+
     def __init__(self, values: dict) -> None:
         self.__asset_id = values["assetId"]
         self.__name = values["name"]
         self.__data_format = values["dataFormat"]
         self.__md5_ext = values["md5ext"]
+        self._manager = None # Set by the costume or sound manager the asset belongs to
+
+    def _changed(self) -> None:
+        if self._manager is not None:
+            self._manager._changed()
 
     @property
     def asset_id(self) -> str:
@@ -47,4 +61,78 @@ class Asset:
 
 class AssetData(NamedTuple):
     md5: str
-    ext: str
\ No newline at end of file
+    ext: str
+
+def md5_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Return the hex MD5 hash of a file's contents, reading it in chunks so that memory use stays constant.
+    """
+    md5 = hashlib.md5()
+    with open(file_path, mode="rb") as asset:
+        while (chunk := asset.read(chunk_size)):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+class AssetHashCache:
+    """
+    A persistent cache of asset hashes, stored as JSON at `file_path`. Entries are keyed by a file's absolute
+    path and remembered alongside its size and modification time, so a file is only hashed again once it changes.
+    The cache may be shared between projects, runs and processes; `save` merges with whatever is on disk.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.__file_path = file_path
+        self.__entries: dict[str, list] = self.__load()
+        self.__new_entries: dict[str, list] = {}
+
+    def __load(self) -> dict[str, list]:
+        try:
+            with open(self.__file_path, mode="rb") as cache_file:
+                return JSON.loads(cache_file.read())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            # A corrupt cache is only a missed optimization; it is rebuilt as assets are hashed again.
+            return {}
+
+    @property
+    def file_path(self) -> str:
+        return self.__file_path
+
+    def md5(self, file_path: str) -> str:
+        """
+        Return the hex MD5 hash of a file, from the cache if the file is unchanged since it was last hashed.
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        entry = self.__entries.get(key)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+
+        md5 = md5_file(key)
+        self.__entries[key] = self.__new_entries[key] = [stat.st_size, stat.st_mtime_ns, md5]
+        return md5
+
+    def save(self) -> None:
+        """
+        Write any newly hashed files to the cache file. Entries written by other processes in the meantime are kept.
+        """
+        if not self.__new_entries:
+            return
+
+        entries = self.__load() | self.__new_entries
+        directory = os.path.split(os.path.abspath(self.__file_path))[0]
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a uniquely named file and move it into place, so that concurrent readers never see a partial cache.
+        partial_path = f"{self.__file_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(partial_path, mode="w") as cache_file:
+                cache_file.write(JSON.dumps(entries))
+            os.replace(partial_path, self.__file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        self.__entries = entries
+        self.__new_entries = {}
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from kurt3.project import Project
+
+class BatchResult(NamedTuple):
+    input_path: str
+    output_path: str
+    seconds: float # Wall-clock time taken to open, transform and save the project
+    output_size: int | None # Size in bytes of the saved project, or `None` if it was not saved
+    error: str | None # The formatted traceback, if processing the project failed
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the project was transformed and saved without error.
+        """
+        return self.error is None
+
+def iter_batch(
+    inputs: str | Iterable[str],
+    transform: Callable[[Project], None],
+    output_dir: str,
+    max_workers: int = None,
+    max_in_flight: int = None,
+    project_options: dict = None,
+    save_options: dict = None,
+) -> Iterator[BatchResult]:
+    """
+    Open each of the `inputs` (a list of paths, or a glob pattern such as `projects/**/*.sb3`), call `transform`
+    on it, and save it under its own file name in `output_dir`, yielding a `BatchResult` as each project finishes.
+    The work is spread over up to `max_workers` processes, so `transform` must be picklable, i.e. a function
+    defined at the top level of a module. At most `max_in_flight` projects (by default, twice the number of workers)
+    are queued at once. `project_options` and `save_options` are passed on to `Project` and `Project.save`.
+    A project that fails is reported in its result rather than stopping the rest of the batch.
+    """
+    input_paths = _expand_inputs(inputs)
+    output_paths = _output_paths(input_paths, output_dir)
+    if max_in_flight is None:
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+    if type(max_in_flight) is not int or max_in_flight < 1:
+        raise ValueError(f"Maximum in-flight projects must be a positive integer, but {max_in_flight} was received.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers) as pool:
+        pending: dict[Future, tuple[str, str]] = {}
+        jobs = iter(zip(input_paths, output_paths))
+        while True:
+            # Only a bounded number of projects are queued up, so that a huge batch is not all submitted at once
+            for input_path, output_path in jobs:
+                future = pool.submit(_process, input_path, output_path, transform, project_options or {}, save_options or {})
+                pending[future] = input_path, output_path
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+
+            done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                input_path, output_path = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception:
+                    # The worker itself failed, e.g. it was killed or the transform could not be pickled
+                    yield BatchResult(input_path, output_path, 0.0, None, traceback.format_exc())
+
+def run_batch(
+    inputs: str | Iterable[str],
+    transform: Callable[[Project], None],
+    output_dir: str,
+    max_workers: int = None,
+    max_in_flight: int = None,
+    project_options: dict = None,
+    save_options: dict = None,
+) -> list[BatchResult]:
+    """
+    The same as `iter_batch`, except that every result is returned at once, in the same order as the inputs.
+    """
+    input_paths = _expand_inputs(inputs)
+    results = {
+        result.input_path: result
+        for result in iter_batch(input_paths, transform, output_dir, max_workers, max_in_flight, project_options, save_options)
+    }
+    return [results[input_path] for input_path in input_paths]
+
+def _expand_inputs(inputs: str | Iterable[str]) -> list[str]:
+    if type(inputs) is str:
+        return sorted(glob.glob(inputs, recursive=True))
+
+    input_paths = list(inputs)
+    for input_path in input_paths:
+        if type(input_path) is not str:
+            raise TypeError(f"Batch inputs must be file paths, but {input_path} of type {type(input_path)} was received.")
+    if len(set(input_paths)) != len(input_paths):
+        raise ValueError("Batch inputs must not contain the same project more than once.")
+    return input_paths
+
+def _output_paths(input_paths: list[str], output_dir: str) -> list[str]:
+    output_paths = [os.path.join(output_dir, os.path.basename(input_path)) for input_path in input_paths]
+    if len(set(output_paths)) != len(output_paths):
+        raise ValueError("Batch inputs from different folders share file names, so they would overwrite one another in the output folder.")
+    return output_paths
+
+def _process(input_path: str, output_path: str, transform: Callable[[Project], None], project_options: dict, save_options: dict) -> BatchResult:
+    start = time.perf_counter()
+    project = None
+    try:
+        # The project is opened and closed explicitly, as its with-block would print and swallow any error.
+        # It is created first, so that it is closed even if opening it fails partway.
+        project = Project(input_path, **project_options)
+        project.open()
+        transform(project)
+        project.save(output_path, **save_options)
+    except Exception:
+        return BatchResult(input_path, output_path, time.perf_counter() - start, None, traceback.format_exc())
+    finally:
+        if project is not None:
+            project.close()
+    return BatchResult(input_path, output_path, time.perf_counter() - start, os.path.getsize(output_path), None)
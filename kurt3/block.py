@@ -1,28 +1,132 @@
 from __future__ import annotations
+from typing import TYPE_CHECKING
 from kurt3.comment import Comment
 from kurt3.subject import IDObject, IDObjectManager
 
+if TYPE_CHECKING:
+    from kurt3.references import ReferenceIndex
+
 
 class BlockManager(IDObjectManager):
     def __init__(self, block_dict) -> None:
+        # Maps each parent block's ID to the IDs of the blocks whose parent it is, in insertion order:
+        # the block after it, substacks, and blocks plugged into its inputs.
+        self._children: dict[str, dict[str, None]] = {}
+        # Maps each opcode to the blocks that have it, keyed by ID
+        self._opcodes: dict[str, dict[str, Block]] = {}
+        self._references: ReferenceIndex = None
         super().__init__(BlockManager.create_block, block_dict)
 
+    def _attach_references(self, references: ReferenceIndex) -> None:
+        """
+        Record this manager's blocks in a project-wide `ReferenceIndex`, and keep it up to date from now on.
+        """
+        self._references = references
+        for block in self._index.values():
+            references._add_block(block)
+
+    def _detach_references(self) -> None:
+        for block in self._index.values():
+            self._references._remove_block(block)
+        self._references = None
+
     def _add_block(self, *blocks: list[Block]):
         for block in blocks:
-            self._items.append(block)
+            self._add(block)
+
+    def _remove_block(self, *blocks: list[Block]):
+        for block in blocks:
+            self._remove(block)
+
+    def _add(self, block: Block) -> None:
+        super()._add(block)
+        if block._parent is not None:
+            self._children.setdefault(block._parent, {})[block._id] = None
+        self._opcodes.setdefault(block.opcode, {})[block._id] = block
+        if self._references is not None:
+            self._references._add_block(block)
+
+    def _remove(self, block: Block) -> None:
+        super()._remove(block)
+        if block._parent is not None:
+            self._unlink(block._parent, block._id)
+        same_opcode = self._opcodes[block.opcode]
+        del same_opcode[block._id]
+        if not same_opcode:
+            del self._opcodes[block.opcode]
+        if self._references is not None:
+            self._references._remove_block(block)
+
+    def by_opcode(self, opcode: str) -> list[Block]:
+        """
+        Return every block with the given `opcode`, e.g. `looks_sayforsecs`.
+        """
+        return list(self._opcodes.get(opcode, {}).values())
+
+    def ids_by_opcode(self, opcode: str) -> list[str]:
+        """
+        Return the ID of every block with the given `opcode`.
+        """
+        return list(self._opcodes.get(opcode, {}))
+
+    def opcode_counts(self) -> dict[str, int]:
+        """
+        Return the number of blocks of each opcode.
+        """
+        return {opcode: len(blocks) for opcode, blocks in self._opcodes.items()}
+
+    def _link(self, parent_id: str, child_id: str) -> None:
+        self._children.setdefault(parent_id, {})[child_id] = None
+
+    def _unlink(self, parent_id: str, child_id: str) -> None:
+        siblings = self._children.get(parent_id, {})
+        siblings.pop(child_id, None)
+        if not siblings:
+            self._children.pop(parent_id, None)
+
+    def _block(self, id: str) -> Block | None:
+        return self._index.get(id)
+
+    def children(self, block: Block | str) -> list[Block]:
+        """
+        Return the blocks whose parent is `block` (given as a `Block` or an ID): the block after it, the
+        blocks in its substacks, and any reporters or menus plugged into its inputs.
+        """
+        id = block._id if isinstance(block, Block) else block
+        return [self._index[c] for c in self._children.get(id, ()) if c in self._index]
+
+    def walk_ids(self, block: Block | str):
+        """
+        Iterate over the IDs of `block` and everything attached to it, in the same order as `Block.walk`.
+        """
+        stack = [block._id if isinstance(block, Block) else block]
+        while stack:
+            id = stack.pop()
+            yield id
+            stack.extend(reversed([c for c in self._children.get(id, ()) if c in self._index]))
+
+    @property
+    def top_level_blocks(self) -> list[TopLevelBlock]:
+        """
+        The blocks at the top of each script, as well as any loose reporters, in this target's code area.
+        """
+        return [b for b in self._index.values() if b.is_top_level]
 
     @staticmethod
     def create_block(id, block_dict):
-        # Avoid using keyword as argument
-        block_dict["_next"] = block_dict["next"]
-        del block_dict["next"]
+        # Avoid using keyword as argument. The parsed block is left as it is, as it may already have been
+        # handed out as part of its target's output.
+        values = {key: value for key, value in block_dict.items() if key != "next"}
+        values["_next"] = block_dict["next"]
 
-        if block_dict["topLevel"] is True:
-            return TopLevelBlock(id, **block_dict)
+        if values["topLevel"] is True:
+            return TopLevelBlock(id, **values)
         else:
-            return Block(id, **block_dict)
+            return Block(id, **values)
 
 class Block(IDObject):
+    __slots__ = ("__opcode", "_next", "_parent", "__inputs", "__fields", "__shadow", "__top_level", "__comment", "_output_cache")
+
     def __init__(self,
         id = None,
         opcode = None,
@@ -38,12 +142,14 @@ class Block(IDObject):
         self.__opcode = opcode
         self._next = _next
         self._parent = parent
-        self.__inputs = InputManager(inputs)
-        self.__fields = FieldsManager(fields)
+        # Inputs and fields are kept as they were given until they are first asked for, as most never are
+        self.__inputs: InputManager | dict = inputs
+        self.__fields: FieldsManager | dict = fields
         self.__shadow = shadow
         self.__top_level = topLevel
         if comment:
             self.__comment = comment
+        self._output_cache: dict = None # The block's output, kept until the block next changes
     
     @property
     def opcode(self) -> str:
@@ -54,19 +160,126 @@ class Block(IDObject):
     
     @property
     def next(self) -> Block | None:
-        # Get the next block, as a Block object somehow
-        pass
+        """
+        The block attached underneath this one, if any.
+        """
+        return self._resolve(self._next)
     
     @property
     def parent(self) -> Block | None:
-        # Get parent block as a Block object
-        pass
+        """
+        The block that this block is attached to, either underneath it or inside one of its inputs or substacks.
+        """
+        return self._resolve(self._parent)
+
+    @property
+    def children(self) -> list[Block]:
+        """
+        The blocks directly attached to this one: the block after it, the first block of each substack and
+        any reporters or menus in its inputs.
+        """
+        if self._manager is None:
+            return []
+        return self._manager.children(self)
+
+    def input_block(self, name: str) -> Block | None:
+        """
+        Return the block plugged into the input called `name` (e.g. `SUBSTACK` or `CONDITION`), or `None`
+        if the input holds a plain value.
+        """
+        if (value := self._input_values().get(name)) is None:
+            raise KeyError(f"No item with ID {name} exists.")
+        # Inputs take the form [shadow type, block ID or primitive, (obscured shadow)]
+        if len(value) > 1 and type(value[1]) is str:
+            return self._resolve(value[1])
+        return None
+
+    def walk(self):
+        """
+        Iterate over this block and everything attached to it, i.e. the rest of its script, including
+        substacks, reporters and menus. Each block is visited once, in time proportional to the size of the script.
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            yield block
+            stack.extend(reversed(block.children))
+
+    def _changed(self) -> None:
+        self._output_cache = None
+        super()._changed()
+
+    def _resolve(self, id: str | None) -> Block | None:
+        if id is None or self._manager is None:
+            return None
+        return self._manager._block(id)
+
+    def _set_parent(self, parent_id: str | None) -> None:
+        if self._manager is not None and self._parent is not None:
+            self._manager._unlink(self._parent, self._id)
+        self._parent = parent_id
+        self.__top_level = parent_id is None
+        if self._manager is not None and parent_id is not None:
+            self._manager._link(parent_id, self._id)
+        self._changed()
+
+    def _set_next(self, next_id: str | None) -> None:
+        self._next = next_id
+        self._changed()
+
+    def _detach_child(self, child_id: str) -> None:
+        """
+        Stop referring to `child_id` as the block after this one, or in whichever input holds it.
+        """
+        if self._next == child_id:
+            self._set_next(None)
+            return
+
+        for name, value in list(self._input_values().items()):
+            if (new_value := Block._input_without(value, child_id)) is not value:
+                self._set_input(name, new_value)
+
+    def _set_input(self, name: str, value: list | None) -> None:
+        """
+        Give the input called `name` a new value, or remove it if `value` is `None`. Values are replaced rather than
+        changed in place, as output handed out earlier may share them.
+        """
+        if type(self.__inputs) is dict:
+            self.__inputs = {n: v for n, v in self.__inputs.items() if n != name} if value is None else self.__inputs | {name: value}
+            self._changed()
+        elif value is None:
+            self.__inputs._remove(self.__inputs.by_id(name))
+        else:
+            self.__inputs.by_id(name)._set_value(value)
+
+    def _set_field(self, name: str, value: list) -> None:
+        """
+        Give the field called `name` a new value, replacing its old one as `_set_input` does.
+        """
+        if type(self.__fields) is dict:
+            self.__fields = self.__fields | {name: value}
+            self._changed()
+        else:
+            self.__fields.by_id(name)._set_value(value)
+
+    @staticmethod
+    def _input_without(value: list, block_id: str) -> list | None:
+        # Inputs take the form [shadow type, block ID or primitive, (obscured shadow)]. Without its block, an input
+        # falls back to the shadow it obscured, or is left out altogether if there is none (e.g. an empty substack).
+        if len(value) > 1 and value[1] == block_id:
+            return [1, value[2]] if len(value) > 2 and value[2] is not None else None
+        if len(value) > 2 and value[2] == block_id:
+            return [2, value[1]]
+        return value
 
     @property
     def inputs(self) -> InputManager:
         """
         Return the inputs to this block.
         """
+        if type(self.__inputs) is dict:
+            self.__inputs = InputManager(self.__inputs)
+            self.__inputs._owner = self
         return self.__inputs
     
     @property
@@ -74,7 +287,17 @@ class Block(IDObject):
         """
         Return the fields applicable to this block.
         """
+        if type(self.__fields) is dict:
+            self.__fields = FieldsManager(self.__fields)
+            self.__fields._owner = self
         return self.__fields
+
+    def _input_values(self) -> dict:
+        # The value of each input by name, without building an `InputManager` for them
+        return self.__inputs if type(self.__inputs) is dict else self.__inputs.output()
+
+    def _field_values(self) -> dict:
+        return self.__fields if type(self.__fields) is dict else self.__fields.output()
     
     @property
     def has_shadow(self):
@@ -87,6 +310,7 @@ class Block(IDObject):
     def set_shadow(self, value):
         if type(value) is bool:
             self.__shadow = value
+            self._changed()
         else:
             raise TypeError(f"Shadow must be a boolean value, but {value} of type {type(value)} was received.")
     
@@ -100,27 +324,49 @@ class Block(IDObject):
     def set_next(self, next) -> None:
         """
         Replace this block's "next" block with another, deleting any blocks attached to it previously.
+        The new block may be given as a `Block`, which is added to this block's target if need be, or as the ID
+        of a block already in the target.
         """
-        if type(next) is Block:
-            next.remove_next()
-            self._next = next.__id
-        elif type(next) is str:
-            # maybe check that this variable exists
-            # also need to remove "next" values from block
-            self._next = next
+        if isinstance(next, str):
+            if (block := self._resolve(next)) is None:
+                raise ValueError(f"Block with ID {next} does not exist in this target.")
+            next = block
+        elif not isinstance(next, Block):
+            raise TypeError(f"Next block must be a Block or a block ID, but {next} of type {type(next)} was received.")
+
+        self.remove_next()
+        if self._manager is not None and next._manager is None:
+            self._manager._add(next)
+        if (parent := next.parent) is not None:
+            parent._detach_child(next._id)
+        next._set_parent(self._id)
+        self._set_next(next._id)
 
     def remove_next(self) -> None:
-        if type(self._next) is not None:
-            self.next.remove_next()
-            self.next = None
+        """
+        Delete the block underneath this one, along with everything attached below it.
+        """
+        if (next := self.next) is not None:
+            for block in list(next.walk()):
+                block._manager._remove(block)
+        self._set_next(None)
 
     def output(self) -> dict:
+        """
+        The block as it appears in project.json. This is kept and handed out again until the block changes,
+        so must not be modified.
+        """
+        if self._output_cache is None:
+            self._output_cache = self._output()
+        return self._output_cache
+
+    def _output(self) -> dict:
         default = {
             "opcode": self.__opcode,
             "next": self._next,
             "parent": self._parent,
-            "inputs": self.__inputs.output(),
-            "fields": self.__fields.output(),
+            "inputs": self._input_values(),
+            "fields": self._field_values(),
             "shadow": self.__shadow,
             "topLevel": self.__top_level,
         }
@@ -135,6 +381,8 @@ class Block(IDObject):
             self.set_next(block)
 
 class TopLevelBlock(Block):
+    __slots__ = ("__x", "__y")
+
     def __init__(self,
         id = None,
         x = 0,
@@ -154,10 +402,12 @@ class TopLevelBlock(Block):
         self._validate_num(
             -2000,
             2000,
-            lambda: setattr(self, "__x", value),
+            # The attribute is named as it is stored, since setattr does not mangle private names
+            lambda: setattr(self, "_TopLevelBlock__x", value),
             value,
             "x-coordinate"
         )
+        self._changed()
     
     @property
     def y(self):
@@ -168,38 +418,56 @@ class TopLevelBlock(Block):
         self._validate_num(
             -2000,
             2000,
-            lambda: setattr(self, "__y", value),
+            # The attribute is named as it is stored, since setattr does not mangle private names
+            lambda: setattr(self, "_TopLevelBlock__y", value),
             value,
             "y-coordinate"
         )
+        self._changed()
     
-    def output(self) -> dict:
-        return super().output() | {
+    def _output(self) -> dict:
+        return super()._output() | {
             "x": self.__x,
             "y": self.__y
         }
 
 class InputManager(IDObjectManager):
+    __slots__ = ()
+
     def __init__(self, input_dict: dict) -> None:
         super().__init__(BlockInput, input_dict)
 
 class BlockInput(IDObject):
+    __slots__ = ("__value",)
+
     def __init__(self, id, value) -> None:
         super().__init__(id)
         self.__value = value
+
+    def _set_value(self, value) -> None:
+        self.__value = value
+        self._changed()
     
     # Idk what else to add here
     def output(self):
         return self.__value
 
 class FieldsManager(IDObjectManager):
+    __slots__ = ()
+
     def __init__(self, input_dict) -> None:
         super().__init__(BlockFields, input_dict)
 
 class BlockFields(IDObject):
+    __slots__ = ("__value",)
+
     def __init__(self, id, value) -> None:
         super().__init__(id)
         self.__value = value
+
+    def _set_value(self, value) -> None:
+        self.__value = value
+        self._changed()
     
     def output(self):
         return self.__value
@@ -0,0 +1,376 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Iterator
+
+from kurt3.block import Block, BlockManager, TopLevelBlock
+from kurt3.references import value_references
+from kurt3.subject import Manager
+
+if TYPE_CHECKING:
+    from kurt3.ids import IDRegistry
+    from kurt3.references import ReferenceIndex
+
+NO_ROW = -1
+
+# Bits of the flags column
+SHADOW = 0x01
+TOP_LEVEL = 0x02
+
+# The properties a block may have in project.json, as `BlockManager.create_block` accepts them
+BLOCK_PROPERTIES = {"opcode", "next", "parent", "inputs", "fields", "shadow", "topLevel", "comment", "x", "y"}
+
+class BlockTable(Manager):
+    """
+    Stores a target's blocks column by column rather than as one object per block, for projects with very many blocks.
+    Each block is a row: its opcode is an interned integer code, its next and parent blocks are row numbers in
+    `array`-backed columns, and its inputs and fields are held in side tables as they were parsed. `Block` objects
+    are only created for the blocks that are asked for, after which that object is the authority on its block's
+    state; the rest are written straight from their rows on save. Opcode counts, opcode lookups and `walk_ids`
+    work on the columns alone.
+
+    It can be used anywhere a `BlockManager` is, by choosing `block_storage="table"` when opening a `Project`.
+    """
+
+    def __init__(self, block_dict: dict) -> None:
+        self.__ids: list[str | None] = list(block_dict) # None once a block is removed; row numbers never change
+        self.__rows: dict[str, int] = {id: row for row, id in enumerate(self.__ids)}
+
+        self.__opcode_names: list[str] = []
+        self.__opcode_codes: dict[str, int] = {}
+        # The live rows holding each opcode, by code, in increasing order; and the IDs of those rows, in the same order
+        self.__opcode_rows: list[array] = []
+        self.__opcode_ids: list[list[str]] = []
+        self.__opcode_counts: dict[str, int] = {}
+
+        self.__opcodes = array("H")
+        self.__next = array("l")
+        self.__parent = array("l")
+        self.__flags = array("B")
+        self.__inputs: list[dict | None] = [] # None stands in for no inputs or fields at all, the commonest case
+        self.__fields: list[dict | None] = []
+        self.__positions: dict[int, tuple] = {} # The (x, y) of top-level blocks
+        self.__comments: dict[int, str] = {}
+        self.__unresolved: dict[tuple[int, str], str] = {} # Next or parent IDs that name no block in the target
+
+        self.__objects: dict[int, Block] = {} # Blocks that have been handed out, which take precedence over their rows
+        self.__child_offsets: array = None # Children of each row, built from the parent column when first needed
+        self.__child_rows: array = None
+
+        self._registry: IDRegistry = None
+        self._references: ReferenceIndex = None
+        self._owner = None
+
+        # Loaded in a single pass, with the columns bound to locals as this runs once per block
+        rows, unresolved, positions, comments = self.__rows, self.__unresolved, self.__positions, self.__comments
+        codes, opcode_rows, opcode_ids, counts = self.__opcode_codes, self.__opcode_rows, self.__opcode_ids, self.__opcode_counts
+        append_opcode, append_next, append_parent = self.__opcodes.append, self.__next.append, self.__parent.append
+        append_flags, append_inputs, append_fields = self.__flags.append, self.__inputs.append, self.__fields.append
+        for row, (id, values) in enumerate(block_dict.items()):
+            # Only blocks with more properties than usual can have any that are not understood
+            if len(values) > 7 and not values.keys() <= BLOCK_PROPERTIES:
+                raise TypeError(f"Block {id} has unexpected properties: {', '.join(sorted(values.keys() - BLOCK_PROPERTIES))}.")
+
+            opcode = values["opcode"]
+            if (code := codes.get(opcode)) is None:
+                code = self.__new_opcode(opcode)
+            append_opcode(code)
+            opcode_rows[code].append(row)
+            opcode_ids[code].append(id)
+            counts[opcode] += 1
+
+            if (next := values["next"]) is None:
+                append_next(NO_ROW)
+            elif (next_row := rows.get(next)) is None:
+                append_next(NO_ROW)
+                unresolved[row, "next"] = next
+            else:
+                append_next(next_row)
+
+            if (parent := values["parent"]) is None:
+                append_parent(NO_ROW)
+            elif (parent_row := rows.get(parent)) is None:
+                append_parent(NO_ROW)
+                unresolved[row, "parent"] = parent
+            else:
+                append_parent(parent_row)
+
+            top_level = values["topLevel"] is True
+            append_flags((SHADOW if values["shadow"] else 0) | (TOP_LEVEL if top_level else 0))
+            append_inputs(values["inputs"] or None)
+            append_fields(values["fields"] or None)
+            if top_level:
+                positions[row] = (values.get("x", 0), values.get("y", 0))
+            if "comment" in values and values["comment"]:
+                comments[row] = values["comment"]
+
+    def __new_opcode(self, opcode: str) -> int:
+        code = self.__opcode_codes[opcode] = len(self.__opcode_names)
+        self.__opcode_names.append(opcode)
+        self.__opcode_rows.append(array("l"))
+        self.__opcode_ids.append([])
+        self.__opcode_counts[opcode] = 0
+        return code
+
+    def __add_opcode(self, opcode: str, row: int, id: str) -> None:
+        if (code := self.__opcode_codes.get(opcode)) is None:
+            code = self.__new_opcode(opcode)
+        self.__opcodes.append(code)
+        self.__opcode_rows[code].append(row)
+        self.__opcode_ids[code].append(id)
+        self.__opcode_counts[opcode] += 1
+
+    def __remove_opcode(self, row: int) -> None:
+        # Rows are only ever added at the end, so each opcode's rows are in order and the row can be found by bisection
+        code = self.__opcodes[row]
+        rows = self.__opcode_rows[code]
+        i = bisect_left(rows, row)
+        del rows[i]
+        del self.__opcode_ids[code][i]
+        self.__opcode_counts[self.__opcode_names[code]] -= 1
+
+    def __iter__(self) -> Iterator[Block]:
+        return (self.__block_at(row) for row in self.__live_rows())
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+    def __contains__(self, id) -> bool:
+        return id in self.__rows
+
+    def __live_rows(self) -> Iterator[int]:
+        return (row for row, id in enumerate(self.__ids) if id is not None)
+
+    def by_id(self, id) -> Block:
+        """
+        Get the block with the given `id`.
+        """
+        try:
+            return self.__block_at(self.__rows[id])
+        except KeyError:
+            raise KeyError(f"No item with ID {id} exists.") from None
+
+    def _block(self, id: str) -> Block | None:
+        row = self.__rows.get(id)
+        return None if row is None else self.__block_at(row)
+
+    def __block_at(self, row: int) -> Block:
+        if (block := self.__objects.get(row)) is not None:
+            return block
+
+        values = self.__row_output(row)
+        values["_next"] = values.pop("next")
+        if values["topLevel"]:
+            block = TopLevelBlock(self.__ids[row], **values)
+        else:
+            block = Block(self.__ids[row], **values)
+        block._manager = self
+        self.__objects[row] = block
+        return block
+
+    def __row_output(self, row: int) -> dict:
+        # Laid out as `Block.output` lays its output out
+        flags = self.__flags[row]
+        output = {
+            "opcode": self.__opcode_names[self.__opcodes[row]],
+            "next": self.__row_id(row, self.__next[row], "next"),
+            "parent": self.__row_id(row, self.__parent[row], "parent"),
+            "inputs": self.__inputs[row] or {},
+            "fields": self.__fields[row] or {},
+            "shadow": bool(flags & SHADOW),
+            "topLevel": bool(flags & TOP_LEVEL),
+        }
+        if row in self.__comments:
+            output["comment"] = self.__comments[row]
+        if flags & TOP_LEVEL:
+            output["x"], output["y"] = self.__positions[row]
+        return output
+
+    def __row_id(self, row: int, other_row: int, key: str) -> str | None:
+        if other_row == NO_ROW:
+            return self.__unresolved.get((row, key))
+        return self.__ids[other_row]
+
+    def _add_block(self, *blocks: list[Block]):
+        for block in blocks:
+            self._add(block)
+
+    def _remove_block(self, *blocks: list[Block]):
+        for block in blocks:
+            self._remove(block)
+
+    def _add(self, block: Block) -> None:
+        if block._id in self.__rows:
+            raise ValueError(f"An item with ID {block._id} already exists.")
+
+        # New blocks are already objects, so their rows only need to record what the columns are searched by
+        row = len(self.__ids)
+        self.__ids.append(block._id)
+        self.__rows[block._id] = row
+        self.__add_opcode(block.opcode, row, block._id)
+        self.__next.append(NO_ROW)
+        self.__parent.append(NO_ROW)
+        self.__flags.append(0)
+        self.__inputs.append(None)
+        self.__fields.append(None)
+        self.__objects[row] = block
+        block._manager = self
+
+        self.__child_offsets = None
+        if self._registry is not None:
+            self._registry.add(block._id)
+        if self._references is not None:
+            self._references._add_block(block)
+        self._changed()
+
+    def _remove(self, block: Block) -> None:
+        row = self.__rows.pop(block._id)
+        self.__ids[row] = None
+        self.__next[row] = self.__parent[row] = NO_ROW
+        self.__objects.pop(row, None)
+        self.__inputs[row] = self.__fields[row] = None
+        self.__positions.pop(row, None)
+        self.__comments.pop(row, None)
+        self.__unresolved.pop((row, "next"), None)
+        self.__unresolved.pop((row, "parent"), None)
+        block._manager = None
+        self.__remove_opcode(row)
+
+        self.__child_offsets = None
+        if self._registry is not None:
+            self._registry.discard(block._id)
+        if self._references is not None:
+            self._references._remove_block(block)
+        self._changed()
+
+    def _link(self, parent_id: str, child_id: str) -> None:
+        self.__child_offsets = None
+
+    def _unlink(self, parent_id: str, child_id: str) -> None:
+        self.__child_offsets = None
+
+    def __children_of(self, row: int) -> array:
+        if self.__child_offsets is None:
+            self.__build_children()
+        return self.__child_rows[self.__child_offsets[row]:self.__child_offsets[row + 1]]
+
+    def __build_children(self) -> None:
+        # A counting sort of the rows by their parent, so that each row's children are one slice of `child_rows`
+        parents = self.__parent
+        if self.__objects:
+            parents = array("l", parents)
+            for row, block in self.__objects.items():
+                parents[row] = self.__rows.get(block._parent, NO_ROW)
+        offsets = array("l", bytes(array("l").itemsize * (len(parents) + 1)))
+        for parent in parents:
+            if parent != NO_ROW:
+                offsets[parent + 1] += 1
+        for row in range(len(parents)):
+            offsets[row + 1] += offsets[row]
+
+        fill = array("l", offsets)
+        children = array("l", bytes(array("l").itemsize * offsets[-1]))
+        for row, parent in enumerate(parents):
+            if parent != NO_ROW:
+                children[fill[parent]] = row
+                fill[parent] += 1
+        self.__child_offsets, self.__child_rows = offsets, children
+
+    def children(self, block: Block | str) -> list[Block]:
+        """
+        Return the blocks whose parent is `block` (given as a `Block` or an ID): the block after it, the
+        blocks in its substacks, and any reporters or menus plugged into its inputs.
+        """
+        id = block._id if isinstance(block, Block) else block
+        if (row := self.__rows.get(id)) is None:
+            return []
+        return [self.__block_at(child) for child in self.__children_of(row)]
+
+    def walk_ids(self, block: Block | str) -> Iterator[str]:
+        """
+        Iterate over the IDs of `block` and everything attached to it, in the same order as `Block.walk`,
+        without creating a `Block` for any of them.
+        """
+        stack = [self.__rows[block._id if isinstance(block, Block) else block]]
+        while stack:
+            row = stack.pop()
+            yield self.__ids[row]
+            stack.extend(reversed(self.__children_of(row)))
+
+    def by_opcode(self, opcode: str) -> list[Block]:
+        """
+        Return every block with the given `opcode`, e.g. `looks_sayforsecs`.
+        """
+        if (code := self.__opcode_codes.get(opcode)) is None:
+            return []
+        return [self.__block_at(row) for row in self.__opcode_rows[code]]
+
+    def ids_by_opcode(self, opcode: str) -> list[str]:
+        """
+        Return the ID of every block with the given `opcode`, without creating a `Block` for any of them.
+        """
+        if (code := self.__opcode_codes.get(opcode)) is None:
+            return []
+        return list(self.__opcode_ids[code])
+
+    def opcode_counts(self) -> dict[str, int]:
+        """
+        Return the number of blocks of each opcode.
+        """
+        return {opcode: count for opcode, count in self.__opcode_counts.items() if count}
+
+    @property
+    def top_level_blocks(self) -> list[TopLevelBlock]:
+        """
+        The blocks at the top of each script, as well as any loose reporters, in this target's code area.
+        """
+        return [
+            self.__block_at(row) for row in self.__live_rows()
+            if (self.__objects[row].is_top_level if row in self.__objects else self.__flags[row] & TOP_LEVEL)
+        ]
+
+    def _attach_registry(self, registry: IDRegistry) -> None:
+        self._registry = registry
+        for id in self.__rows:
+            registry.add(id)
+
+    def _detach_registry(self) -> None:
+        for id in self.__rows:
+            self._registry.discard(id)
+        self._registry = None
+
+    def _generate_id(self) -> str:
+        if self._registry is None:
+            raise RuntimeError("IDs can only be generated once this manager belongs to an open project.")
+        return self._registry.generate_id()
+
+    def _attach_references(self, references: ReferenceIndex) -> None:
+        """
+        Record the blocks that use a variable, list or broadcast in a project-wide `ReferenceIndex`; only those
+        blocks are made into objects.
+        """
+        self._references = references
+        for row in self.__live_rows():
+            if row in self.__objects or value_references(self.__fields[row] or {}, self.__inputs[row] or {}):
+                references._add_block(self.__block_at(row))
+
+    def _detach_references(self) -> None:
+        for block in self.__objects.values():
+            self._references._remove_block(block)
+        self._references = None
+
+    def output(self) -> dict:
+        return dict(self._iter_output())
+
+    def _iter_output(self):
+        for row in self.__live_rows():
+            if (block := self.__objects.get(row)) is not None:
+                yield block._id, block.output()
+            else:
+                yield self.__ids[row], self.__row_output(row)
+
+# The ways a target can store its blocks, by name
+BLOCK_STORAGE = {
+    "objects": BlockManager,
+    "table": BlockTable,
+}
@@ -53,8 +53,7 @@ def ThinkForSecs(project: Project, secs = 2, message = "Hmm...") -> Block:
     )
 
 def SwitchCostumeTo(project: Project, costume: str) -> Tuple[Block, Block]:
-    id1 = project.generate_id()
-    id2 = project.generate_id()
+    id1, id2 = project.generate_ids(2)
 
     switch_costume_to = Block (
         id = id1,
@@ -92,8 +91,7 @@ def NextCostume(project: Project) -> Block:
     )
 
 def SwitchBackdropTo(project: Project, backdrop: str = "backdrop1") -> Block:
-    id1 = project.generate_id()
-    id2 = project.generate_id()
+    id1, id2 = project.generate_ids(2)
 
     switch_backdrop_to = Block (
         id = id1,
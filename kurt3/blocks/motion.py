@@ -76,8 +76,7 @@ def GlideSecsToXY(project: Project, secs = 1, x = 0, y = 0) -> Block:
         )
 
 def GlideSecsToMenu(project: Project, secs = 1, goto: str = "_random_") -> Tuple[Block, Block]:
-    id1 = project.generate_id()
-    id2 = project.generate_id()
+    id1, id2 = project.generate_ids(2)
 
     glide_to = Block (
         id = id1,
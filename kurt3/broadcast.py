@@ -1,11 +1,13 @@
-from kurt3.subject import IDObject, IDObjectManager
+from kurt3.subject import IDObject, Searchable
 
 
-class BroadcastManager(IDObjectManager):
+class BroadcastManager(Searchable):
     def __init__(self, broadcast_dict) -> None:
         super().__init__(Broadcast, broadcast_dict)
     
 class Broadcast(IDObject):
+    __slots__ = ("__name",)
+
     def __init__(self, id, name) -> None:
         super().__init__(id)
         self.__name = name
@@ -16,6 +18,17 @@ class Broadcast(IDObject):
         The name of the broadast.
         """
         return self.__name
+
+    @name.setter
+    def name(self, value: str):
+        if type(value) is not str:
+            raise TypeError(f"Broadcast name must be a string, but {value} of type {type(value)} was received.")
+
+        old_name = self.__name
+        self.__name = value
+        if self._manager is not None:
+            self._manager._renamed(self, old_name)
+        self._changed()
     
     def output(self):
         return self.__name
\ No newline at end of file
@@ -6,6 +6,8 @@ class CommentManager(IDObjectManager):
         super().__init__(Comment, comment_dict)
 
 class Comment(IDObject):
+    __slots__ = ("__block_id", "__x", "__y", "__width", "__height", "__minimized", "__text")
+
     def __init__(self, id, values) -> None:
         super().__init__(id)
         self.__block_id = values["blockId"]
@@ -72,6 +74,7 @@ class Comment(IDObject):
             raise TypeError(f"Comment must be of type string, but {value} of type {type(value)} was received.")
 
         self.__text = value
+        self._changed()
 
     def output(self):
         return {
@@ -2,11 +2,15 @@ from __future__ import annotations
 import os
 
 from kurt3.asset import Asset
+from kurt3.subject import Manager
 
 
-class CostumeManager:
+class CostumeManager(Manager):
     def __init__(self, costume_list: list[dict]) -> None:
         self.__costumes = [Costume.create_costume(c) for c in costume_list]
+        self.__names = {c.name for c in self.__costumes}
+        for c in self.__costumes:
+            c._manager = self
 
     def __iter__(self):
         return iter(self.__costumes)
@@ -18,8 +22,14 @@ class CostumeManager:
     def costumes(self):
         return self.__costumes
 
-    def _add(self, md5_hash: str, name: str, extension: str, rotation_center = (0, 0)):
-        self.__costumes.append(Costume.create_costume(
+    def has_name(self, name: str) -> bool:
+        """
+        Whether this target already has a costume called `name`.
+        """
+        return name in self.__names
+
+    def _add(self, md5_hash: str, name: str, extension: str, rotation_center = (0, 0), bitmap_resolution = 1):
+        costume = Costume.create_costume(
             {
                 "assetId": md5_hash,
                 "name": name,
@@ -27,14 +37,20 @@ class CostumeManager:
                 "dataFormat": extension[1:],
                 "rotationCenterX": rotation_center[0],
                 "rotationCenterY": rotation_center[1],
-                "bitmapResolution": 1
+                "bitmapResolution": bitmap_resolution
             }
-        ))
+        )
+        costume._manager = self
+        self.__costumes.append(costume)
+        self.__names.add(name)
+        self._changed()
 
     def output(self):
         return [c.output() for c in self.__costumes]
     
 class Costume(Asset):
+    __slots__ = ("__rotation_center_x", "__rotation_center_y")
+
     def __init__(self, values: dict) -> None:
         super().__init__(values)
         self.__rotation_center_x = values["rotationCenterX"]
@@ -53,6 +69,7 @@ class Costume(Asset):
         The center of rotation of the image about which it is rotated when rotations are applied to it in Scratch.
         Returns a tuple containing the (x, y) coordinates of the center of rotation.
         """
+        return (self.__rotation_center_x, self.__rotation_center_y)
 
     def output(self) -> dict:
         return super().output() | {
@@ -61,6 +78,8 @@ class Costume(Asset):
         }
 
 class BitmapCostume(Costume):
+    __slots__ = ("__bitmap_resolution",)
+
     def __init__(self, values: dict) -> None:
         super().__init__(values)
         self.__bitmap_resolution = values["bitmapResolution"]
@@ -71,6 +90,7 @@ class BitmapCostume(Costume):
         Tentatively unclear what this refers to. Some images have a resolution of 1, others of 2.
         At any rate, returns the bitmap costume's `bitmapResolution`.
         """
+        return self.__bitmap_resolution
 
     def output(self) -> dict:
         return super().output() | {
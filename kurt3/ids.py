@@ -0,0 +1,142 @@
+from __future__ import annotations
+import random
+from abc import ABC, abstractmethod
+from collections import Counter
+
+VALID_CHARACTERS = "!#$%()*+,-./0123456789:;=?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[]^_`abcdefghijklmnopqrstuvwxyz{|}~"
+
+class IDGenerator(ABC):
+    """
+    Base class of the strategies a project can use to come up with new IDs.
+    Every ID starts with the generator's `prefix`, so that several processes each building part of one project
+    can be given different prefixes (of equal length) and never produce the same ID as one another.
+    """
+
+    def __init__(self, prefix: str = "") -> None:
+        if type(prefix) is not str:
+            raise TypeError(f"ID prefix must be a string, but {prefix} of type {type(prefix)} was received.")
+        if (invalid := set(prefix) - set(VALID_CHARACTERS)):
+            raise ValueError(f"ID prefix ({prefix}) contains characters that are not valid in an ID: {''.join(sorted(invalid))}.")
+        self.__prefix = prefix
+
+    @property
+    def prefix(self) -> str:
+        """
+        The string that every ID from this generator begins with.
+        """
+        return self.__prefix
+
+    def generate(self, l = 20) -> str:
+        """
+        Return a candidate ID of length `l`. Uniqueness is checked, and the candidate discarded if need be, by the `IDRegistry`.
+        """
+        if l <= len(self.__prefix):
+            raise ValueError(f"IDs of length {l} leave no room after the prefix {self.__prefix}.")
+        return self.__prefix + self._generate_body(l - len(self.__prefix))
+
+    @abstractmethod
+    def _generate_body(self, l: int) -> str:
+        """
+        Return the part of an ID of length `l` that follows the prefix.
+        """
+
+class RandomIDGenerator(IDGenerator):
+    """
+    Draws IDs at random. When a `seed` is given the IDs are deterministic, so that building the same project
+    twice produces identical output.
+    """
+
+    def __init__(self, seed = None, prefix: str = "") -> None:
+        super().__init__(prefix)
+        self.__random = random.Random(seed)
+
+    def _generate_body(self, l: int) -> str:
+        return "".join(self.__random.choices(VALID_CHARACTERS, k=l))
+
+class CounterIDGenerator(IDGenerator):
+    """
+    Encodes an incrementing counter over the valid ID characters, which is both the cheapest and a fully deterministic
+    way of producing IDs. Counting begins at `start`.
+    """
+
+    def __init__(self, start: int = 0, prefix: str = "") -> None:
+        super().__init__(prefix)
+        self.__counter = start
+
+    def _generate_body(self, l: int) -> str:
+        value = self.__counter
+        if value >= len(VALID_CHARACTERS) ** l:
+            raise OverflowError(f"Counter {value} does not fit into an ID body of length {l}.")
+        self.__counter += 1
+
+        digits = []
+        while value:
+            value, digit = divmod(value, len(VALID_CHARACTERS))
+            digits.append(VALID_CHARACTERS[digit])
+        return "".join(reversed(digits)).rjust(l, VALID_CHARACTERS[0])
+
+class IDRegistry:
+    """
+    The set of every ID in use across a project: those of blocks, broadcasts, variables, lists and comments.
+    Managers keep it up to date as they gain and lose items, so that checking a newly generated ID for
+    uniqueness is a constant-time lookup rather than a walk over the whole project.
+    IDs are only unique within a target, so each is counted by how many items use it, and stays in use
+    until the last of them is removed.
+    """
+
+    def __init__(self, generator: IDGenerator = None) -> None:
+        self.__ids: Counter[str] = Counter()
+        self.__reserved: set[str] = set() # Generated IDs that no item uses yet
+        self.generator = generator if generator is not None else RandomIDGenerator()
+
+    @property
+    def generator(self) -> IDGenerator:
+        """
+        The strategy used to come up with new IDs.
+        """
+        return self.__generator
+
+    @generator.setter
+    def generator(self, value: IDGenerator):
+        if not isinstance(value, IDGenerator):
+            raise TypeError(f"ID generator must be an IDGenerator, but {value} of type {type(value)} was received.")
+        self.__generator = value
+
+    def __contains__(self, id) -> bool:
+        return id in self.__ids or id in self.__reserved
+
+    def __len__(self) -> int:
+        return len(self.__ids) + len(self.__reserved)
+
+    def add(self, id: str) -> None:
+        """
+        Record one more item using `id`, which takes over its reservation if it was just generated.
+        """
+        self.__reserved.discard(id)
+        self.__ids[id] += 1
+
+    def discard(self, id: str) -> None:
+        """
+        Record one fewer item using `id`; the ID is free again once none do.
+        """
+        if (count := self.__ids.get(id, 0)) > 1:
+            self.__ids[id] = count - 1
+        else:
+            self.__ids.pop(id, None)
+
+    def generate_id(self, l = 20) -> str:
+        """
+        Generate a new ID of length `l` that is not yet used anywhere in the project.
+        The ID is reserved straight away, so it will not be handed out again even before the item it is for is added.
+        """
+        # Generate IDs until a unique one is found (very likely the first attempt)
+        while (uuid := self.__generator.generate(l)) in self:
+            pass
+        self.__reserved.add(uuid)
+        return uuid
+
+    def generate_ids(self, n: int, l = 20) -> list[str]:
+        """
+        Generate `n` distinct, unused IDs of length `l` at once.
+        """
+        return [self.generate_id(l) for i in range(n)]
@@ -3,7 +3,6 @@ from kurt3.subject import IDObject, Searchable
 class ListManager(Searchable):
     def __init__(self, list_dict) -> None:
         super().__init__(ScratchList, list_dict)
-        self.__lists = self._items # Alias for readability
 
     def create_list(self, name: str, value: list =[]) -> None:
         """
@@ -12,17 +11,16 @@ class ListManager(Searchable):
         """
 
         # Check for existence; this really needs to be moved to allow checking other targets as well.
-        for l in self.__lists:
-            if l.name == name:
-                raise ValueError(f"List {name} already exists.")
+        if self.by_name(name):
+            raise ValueError(f"List {name} already exists.")
         
         # Validate list contents before setting
         for item in value:
             if type(item) not in (int, float, str):
                 raise ValueError(f"List values must be numerical or string-type values, but {item} of type {type(item)} was received.")
 
-        self.__lists.append(ScratchList(
-            ListManager.generate_id(), 
+        self._add(ScratchList(
+            self._generate_id(), 
                 [
                     name,
                     value
@@ -31,13 +29,14 @@ class ListManager(Searchable):
         )
     
     def remove_variable(self, name):
-        match = [v for v in self.__lists if v.name == name]
-        if match:
-            self.__lists.remove(match[0])
+        if (match := self.by_name(name)):
+            self._remove(match[0])
         else:
             raise Warning(f"Could not delete variable {name}: variable does not exist.")
 
 class ScratchList(IDObject):
+    __slots__ = ("__name", "__value")
+
     def __init__(self, id, values) -> None:
         super().__init__(id)
         self.__name = values[0]
@@ -50,6 +49,17 @@ class ScratchList(IDObject):
         """
 
         return self.__name
+
+    @name.setter
+    def name(self, value: str):
+        if type(value) is not str:
+            raise TypeError(f"List name must be a string, but {value} of type {type(value)} was received.")
+
+        old_name = self.__name
+        self.__name = value
+        if self._manager is not None:
+            self._manager._renamed(self, old_name)
+        self._changed()
     
     @property
     def value(self) -> list:
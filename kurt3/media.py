@@ -0,0 +1,116 @@
+from __future__ import annotations
+import re
+import struct
+import xml.etree.ElementTree as ElementTree
+from typing import BinaryIO, NamedTuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IMA_ADPCM = 0x0011
+
+_CHUNK_HEADER = struct.Struct("<4sI")
+_FMT_CHUNK = struct.Struct("<HHIIHH")
+_PNG_IHDR = struct.Struct(">I4sII")
+_LENGTH = re.compile(r"\s*([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s*(px)?\s*$")
+
+class SoundInfo(NamedTuple):
+    rate: int
+    sample_count: int
+    format: str # Either "" or, for IMA ADPCM-compressed audio, "adpcm", as Scratch expects
+
+def sound_info(fp: BinaryIO, data_format: str) -> SoundInfo | None:
+    """
+    Return the sample rate, sample count and format of a sound, or `None` if they cannot be read from its headers.
+    """
+    if data_format == "wav":
+        return wav_info(fp)
+    return None
+
+def image_size(fp: BinaryIO, data_format: str) -> tuple[float, float] | None:
+    """
+    Return the width and height of an image, or `None` if they cannot be read from its headers.
+    """
+    if data_format == "png":
+        return png_size(fp)
+    if data_format == "svg":
+        return svg_size(fp)
+    return None
+
+def wav_info(fp: BinaryIO) -> SoundInfo | None:
+    """
+    Read a WAV file's `fmt ` and `data` chunk headers, skipping over the audio data itself.
+    """
+    header = fp.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    samples_per_block = None
+    while len(chunk_header := fp.read(_CHUNK_HEADER.size)) == _CHUNK_HEADER.size:
+        chunk_id, size = _CHUNK_HEADER.unpack(chunk_header)
+        if chunk_id == b"fmt ":
+            body = fp.read(size)
+            if len(body) < _FMT_CHUNK.size:
+                return None
+            fmt = _FMT_CHUNK.unpack_from(body)
+            # ADPCM compresses audio into blocks of a fixed number of samples, given in the fmt chunk's extension
+            if len(body) >= 20:
+                samples_per_block = struct.unpack_from("<H", body, 18)[0]
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, rate, byte_rate, block_align, bits = fmt
+            if audio_format == WAVE_FORMAT_IMA_ADPCM and samples_per_block:
+                blocks, remainder = divmod(size, block_align)
+                # A final, partial block holds one header sample plus two samples per byte after its header
+                partial = 1 + (remainder - 4 * channels) * 2 // channels if remainder > 4 * channels else 0
+                return SoundInfo(rate, blocks * samples_per_block + partial, "adpcm")
+            return SoundInfo(rate, size // block_align if block_align else 0, "")
+        else:
+            # Chunks are padded to an even number of bytes
+            fp.seek(size + (size & 1), 1)
+    return None
+
+def png_size(fp: BinaryIO) -> tuple[int, int] | None:
+    """
+    Read a PNG's dimensions from its `IHDR` chunk, which always comes first.
+    """
+    header = fp.read(len(PNG_SIGNATURE) + _PNG_IHDR.size)
+    if len(header) < len(PNG_SIGNATURE) + _PNG_IHDR.size or not header.startswith(PNG_SIGNATURE):
+        return None
+
+    length, chunk_type, width, height = _PNG_IHDR.unpack_from(header, len(PNG_SIGNATURE))
+    if chunk_type != b"IHDR":
+        return None
+    return width, height
+
+def svg_size(fp: BinaryIO) -> tuple[float, float] | None:
+    """
+    Read an SVG's dimensions from the `width` and `height` of its root element, falling back on its `viewBox`.
+    Parsing stops at the root element, so the rest of the document is never read.
+    """
+    try:
+        for event, element in ElementTree.iterparse(fp, events=("start",)):
+            break
+        else:
+            return None
+    except ElementTree.ParseError:
+        return None
+
+    width = _svg_length(element.get("width"))
+    height = _svg_length(element.get("height"))
+    if width is None or height is None:
+        view_box = (element.get("viewBox") or "").replace(",", " ").split()
+        if len(view_box) != 4:
+            return None
+        try:
+            width, height = float(view_box[2]), float(view_box[3])
+        except ValueError:
+            return None
+    return width, height
+
+def _svg_length(value: str | None) -> float | None:
+    # Only unitless and pixel lengths are absolute; percentages and the like depend on the viewer.
+    if value is None or not (match := _LENGTH.match(value)):
+        return None
+    return float(match.group(1))
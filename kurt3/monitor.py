@@ -100,6 +100,10 @@ class Monitor(HasXY, HasWidthHeight):
         """
         return self.__params
     
+    def _rename(self, name: str) -> None:
+        # The params are replaced rather than changed in place, as output handed out earlier shares them
+        self.__params = {key: name for key in self.__params}
+
     @property
     def name(self) -> str | None:
         """
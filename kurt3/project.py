@@ -1,95 +1,300 @@
 from __future__ import annotations
 import hashlib
+import io
 import os
-import random
-import shutil
+import time
 import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, NamedTuple
+import uuid
 import zipfile
-import tempfile
-import json as JSON
-from kurt3.asset import AssetData
+from kurt3.archive import DEFAULT_COMPRESSION, FIXED_CREATE_SYSTEM, FIXED_DATE_TIME, CompressionPolicy, compress_member, copy_member_raw, write_raw_member
+from kurt3.asset import AssetData, AssetHashCache, md5_file
+from kurt3.block import Block
+from kurt3.block_table import BLOCK_STORAGE
+from kurt3.broadcast import Broadcast
 from kurt3.extensions import ExtensionManager
+from kurt3.ids import IDGenerator, IDRegistry
+from kurt3.lists import ScratchList
+from kurt3.media import image_size, sound_info
 from kurt3.metadata import MetadataManager
-from kurt3.monitor import MonitorManager
+from kurt3.monitor import Monitor, MonitorManager
+from kurt3.references import ReferenceIndex
+from kurt3.serialize import JSONBackend, LazyObject, get_json_backend, write_json
 from kurt3.target import Sprite, Target, TargetManager
 from kurt3.variable import Variable
 
-class Project:
-    def __init__(self, file_path: str) -> None:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Project could not be found at {file_path}.")
+# The assets folder beside the package, found independently of the working directory
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+class SaveReport(NamedTuple):
+    dropped: list[str] # The archive members of assets that nothing referred to any more, and so were not saved
+    bytes_saved: int # The uncompressed size of the dropped assets, as ones added since opening were never compressed
 
-        self.__filepath = file_path
-        self.__filename = os.path.split(file_path)[1]
-        self.__tmp = tempfile.gettempdir()
-        self.__tmp_dir_name = os.path.join(self.__tmp, self.__filename)
+class Project:
+    def __init__(self,
+        file_path: str | os.PathLike | bytes | BinaryIO,
+        id_generator: IDGenerator = None,
+        hash_cache: AssetHashCache | str = None,
+        json_backend: JSONBackend | str = None,
+        deterministic: bool = False,
+        block_storage: str = "objects",
+    ) -> None:
+        """
+        Open the project at `file_path`, or one given in memory as a bytes-like or seekable binary file object. The JSON library it is parsed and saved with can be chosen with `json_backend`;
+        with `deterministic`, saving the same project always gives the same archive, byte for byte, on any system with
+        the same zlib (other builds of zlib may deflate members differently).
+        Each target keeps its blocks as objects unless `block_storage` is `table`, which stores them column by column
+        for projects with very many blocks (see `kurt3.block_table`).
+        """
+        if block_storage not in BLOCK_STORAGE:
+            raise ValueError(f"Unknown block storage {block_storage}; choose one of {', '.join(BLOCK_STORAGE)}.")
+        self.__source = Project._check_source(file_path) # A file path or binary file object
+        self.__archive: zipfile.ZipFile = None # The source .sb3, read from directly rather than extracted
 
-        self.__json = ""
+        self.__template: Callable[[], dict] = None # Supplies project.json already parsed, for projects forked from a template
 
         self.__targets: TargetManager = None
         self.__monitors: MonitorManager = None
         self.__extensions: ExtensionManager = None
         self.__metadata: MetadataManager = None
-
-        self._assets = dict() # List of newly added assets to avoid re-hashing files
+        self.__references: ReferenceIndex = None
+        self.__ids = IDRegistry(id_generator)
+        self._reset_session()
+        # Optionally, hashes are also remembered across projects and runs
+        self.__hash_cache = AssetHashCache(hash_cache) if type(hash_cache) is str else hash_cache
+        # The fastest JSON library available is used unless one is chosen, or output must be deterministic
+        self.__json_backend = get_json_backend(json_backend, deterministic)
+        self.__deterministic = deterministic
+        self.__block_storage = BLOCK_STORAGE[block_storage]
 
     def __enter__(self) -> Project:
-        with zipfile.ZipFile(self.__filepath, "r") as zip_ref:
-            zip_ref.extractall(self.__tmp_dir_name)
-
-        
-        with open(os.path.join(self.__tmp_dir_name, "project.json")) as project_json:
-            self.__json = project_json.read()
+        return self.open()
 
-        parsed_json: dict = JSON.loads(self.__json)
-        
-        self.__targets = TargetManager(parsed_json["targets"])
-        self.__monitors = MonitorManager(parsed_json["monitors"])
-        self.__extensions = ExtensionManager(parsed_json["extensions"])
-        self.__metadata = MetadataManager(parsed_json["meta"])
-        return self
-
-    
     def __exit__(self, exception_type, exception_value, tb):
         if exception_type is not None:
             traceback.print_exception(exception_type, exception_value, tb)
 
-        # Removes the temporary working directory once the project is finished with
-        shutil.rmtree(self.__tmp_dir_name)
+        self.close()
         return True
 
+    def open(self) -> Project:
+        """
+        Open the project's source and parse it, as entering a with-block does. Everything a project holds belongs
+        to that instance alone, so any number of projects can be open at once, across threads and processes,
+        even when they are opened from the same file; a single project should only be used by one thread at a time.
+        """
+        if self.__archive is not None:
+            raise IOError("Project is already open.")
+        # Reopening starts over from the source, so nothing from an earlier session is kept
+        self._reset_session()
+
+        # The archive stays open until the project is closed; project.json is parsed straight from it
+        # and asset members are only read when they are asked for (or copied across on save).
+        self.__archive = zipfile.ZipFile(self.__source, "r")
+        try:
+            if self.__template is not None:
+                parsed_json = self.__template()
+            else:
+                parsed_json: dict = self.__json_backend.loads(self.__archive.read("project.json"))
+
+            # Targets are only built as they are used, and a template's parsed targets are shared by all of its forks
+            self.__targets = TargetManager(parsed_json["targets"], self.__block_storage, shared=self.__template is not None)
+            self.__targets._attach_registry(self.__ids)
+            self.__monitors = MonitorManager(parsed_json["monitors"])
+            self.__extensions = ExtensionManager(parsed_json["extensions"])
+            self.__metadata = MetadataManager(parsed_json["meta"])
+        except BaseException:
+            # Left closed, so that the project can be opened again once its source is fixed
+            self.__archive.close()
+            self.__archive = None
+            raise
+        self.__references = None # Built when first needed, as it needs every target built
+        return self
+
+    def close(self) -> None:
+        """
+        Release the project's source archive, as leaving a with-block does, and write out the hash cache if there is one.
+        The project can no longer be saved or have its original assets read until it is opened again, which parses
+        it afresh from its source; any changes that were not saved are lost.
+        Closing a project that is already closed does nothing.
+        """
+        if self.__archive is None:
+            return
+
+        self.__archive.close()
+        self.__archive = None
+        if self.__hash_cache is not None:
+            self.__hash_cache.save()
+
+    def _reset_session(self) -> None:
+        """
+        Forget the IDs in use and the assets added since the project was last opened.
+        """
+        self.__ids = IDRegistry(self.__ids.generator)
+        self._assets = dict() # List of newly added assets to avoid re-hashing files
+        self._asset_data: dict[str, bytes] = dict() # Data of assets added from memory rather than files, by md5ext
+        self._asset_paths: dict[str, str] = dict() # File paths of assets added from files, by md5ext
+        self._asset_headers = dict() # Metadata read from the headers of newly added assets, by md5ext
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the project's source is currently closed.
+        """
+        return self.__archive is None
+
+    def _set_template(self, template: Callable[[], dict]) -> None:
+        """
+        Have the project take its parsed project.json from `template` when it is opened, rather than parsing its own.
+        The targets it returns may be shared with other projects, so are never modified; everything else must be the project's own.
+        """
+        self.__template = template
+
     @staticmethod
     def new_project() -> Project:
-        return Project("../assets/Blank Project.sb3")
+        return Project(os.path.join(ASSETS_PATH, "Blank Project.sb3"))
+
+    @staticmethod
+    def _check_source(source) -> str | BinaryIO:
+        if isinstance(source, os.PathLike):
+            source = os.fspath(source)
+        if type(source) is str:
+            if not os.path.exists(source):
+                raise FileNotFoundError(f"Project could not be found at {source}.")
+            return source
+        
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return io.BytesIO(source)
+        if not (hasattr(source, "read") and hasattr(source, "seek")):
+            raise TypeError(f"Project must be a file path, bytes-like object or binary file object, but {source} of type {type(source)} was received.")
+        # Reading a zip archive starts from its end, so the stream must be able to seek
+        if hasattr(source, "seekable") and not source.seekable():
+            raise ValueError(f"Project file objects must be seekable, but {source} is not.")
+        return source
 
     def _add_asset(self, file_path) -> None:
         if file_path in self._assets:
             return
 
         self._check_file_path(file_path)
+        self._register_asset_file(file_path, self._hash_asset(file_path))
 
-        with open(file_path, mode="rb") as asset:
-            md5_hash = hashlib.md5(asset.read()).hexdigest()
-            extension = os.path.splitext(file_path)[1]
-            self._assets[file_path] = AssetData(md5_hash, extension)
+    def _register_asset_file(self, file_path: str, md5_hash: str) -> None:
+        self._assets[file_path] = data = AssetData(md5_hash, os.path.splitext(file_path)[1])
+        self._asset_paths[data.md5 + data.ext] = file_path
+
+    def _add_asset_data(self, source: bytes | bytearray | memoryview | BinaryIO, data_format: str) -> AssetData:
+        """
+        Hash and keep hold of asset data given in memory, i.e. as a bytes-like or binary file object,
+        so that it can be written straight into the project on save.
+        """
+        if data_format is None:
+            raise ValueError("A data format (e.g. \"svg\" or \"wav\") must be given for assets that are not added from a file.")
+        self._add_asset_check("Data format", str, data_format)
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            # Take a copy of mutable buffers, so that the data saved is always the data that was hashed
+            data = bytes(source)
+        elif hasattr(source, "read"):
+            data = source.read()
+            if type(data) is not bytes:
+                raise TypeError(f"Asset file objects must be opened in binary mode, but {source} returned {type(data)}.")
+        else:
+            raise TypeError(f"Asset must be a file path, bytes-like object or binary file object, but {source} of type {type(source)} was received.")
+
+        extension = "." + data_format.lstrip(".")
+        md5_hash = hashlib.md5(data).hexdigest()
+        self._asset_data[md5_hash + extension] = data
+        return AssetData(md5_hash, extension)
+
+    def _resolve_asset(self, file_path, data_format: str = None) -> AssetData:
+        """
+        Return the hash and extension of an asset given as a file path or as in-memory data.
+        """
+        if isinstance(file_path, os.PathLike):
+            file_path = os.fspath(file_path)
+        if type(file_path) is not str:
+            return self._add_asset_data(file_path, data_format)
+
+        self._check_file_path(file_path)
+        if file_path not in self._assets:
+            self._add_asset(file_path)
+        return self._assets[file_path]
+
+    def _hash_asset(self, file_path) -> str:
+        if self.__hash_cache is not None:
+            return self.__hash_cache.md5(file_path)
+        return md5_file(file_path)
+
+    def _add_assets(self, file_paths, max_workers: int = None) -> None:
+        """
+        Hash any of the given files that have not been hashed yet, concurrently; hashlib releases the GIL
+        while it works, so this scales across cores.
+        """
+        new_paths = list(dict.fromkeys(f for f in file_paths if f not in self._assets))
+        for file_path in new_paths:
+            self._check_file_path(file_path)
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            hashes = list(pool.map(self._hash_asset, new_paths))
+        
+        for file_path, md5_hash in zip(new_paths, hashes):
+            self._register_asset_file(file_path, md5_hash)
+
+    def _open_new_asset(self, md5_ext: str) -> BinaryIO:
+        if md5_ext in self._asset_data:
+            return io.BytesIO(self._asset_data[md5_ext])
+        return open(self._asset_paths[md5_ext], mode="rb")
+
+    def _read_asset_header(self, md5_ext: str, reader: Callable):
+        """
+        Read metadata about a newly added asset from its file headers with `reader`, once per asset.
+        """
+        if md5_ext not in self._asset_headers:
+            with self._open_new_asset(md5_ext) as asset:
+                self._asset_headers[md5_ext] = reader(asset, os.path.splitext(md5_ext)[1][1:].lower())
+        return self._asset_headers[md5_ext]
+
+    def _costume_metadata(self, md5: str, extension: str) -> dict:
+        if (size := self._read_asset_header(md5 + extension, image_size)) is None:
+            return {}
+        width, height = size
+        return {"rotation_center": (width / 2, height / 2)}
+
+    def _sound_metadata(self, md5: str, extension: str) -> dict:
+        if (info := self._read_asset_header(md5 + extension, sound_info)) is None:
+            return {}
+        return {"rate": info.rate, "sample_count": info.sample_count, "format": info.format}
+
+    def read_asset(self, md5_ext: str) -> bytes:
+        """
+        Return the file data of the asset stored as `md5_ext` (e.g. `83a9787d4cb6f3b7632b4ddfebf74367.wav`),
+        whether it was part of the original project or added since it was opened.
+        """
+        if md5_ext in self._asset_data or md5_ext in self._asset_paths:
+            with self._open_new_asset(md5_ext) as asset:
+                return asset.read()
+        
+        if self.__archive is None:
+            raise IOError("Project file already closed; please read assets inside the with-block.")
+        return self.__archive.read(md5_ext)
 
     def generate_id(self, l = 20) -> str:
-        valid_characters = "!#$%()*+,-./0123456789:;=?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[]^_`abcdefghijklmnopqrstuvwxyz{|}~"
-        existing_ids = self._get_ids()
-        # Generate IDs until a unique one is found (very likely the first attempt) 
-        while (uuid := "".join([random.choice(valid_characters) for i in range(l)])) in existing_ids:
-            pass
-        return uuid
-
-    def _get_ids(self) -> list[str]:
-        ids = set()
-        for t in self.targets:
-            for m in t.blocks._items + t.broadcasts._items + t.variables._items + t.lists._items:
-                ids.add(m._id)
-        return ids
+        """
+        Generate an ID of length `l` that is unique across the whole project.
+        """
+        return self.__ids.generate_id(l)
+
+    def generate_ids(self, n: int, l = 20) -> list[str]:
+        """
+        Generate `n` IDs of length `l` at once, each unique across the whole project and distinct from one another.
+        """
+        return self.__ids.generate_ids(n, l)
 
     def _get_highest_layer(self) -> int:
-        return max([t.layer for t in self.targets])
+        return self.__targets.highest_layer
 
     @staticmethod
     def _check_file_path(file_path) -> None:
@@ -100,6 +305,26 @@ class Project:
         if directory_path != "" and not os.path.exists(directory_path):
             os.makedirs(directory_path, exist_ok=True)
 
+    @property
+    def id_generator(self) -> IDGenerator:
+        """
+        The strategy used to generate new IDs. By default, IDs are random; a seeded `RandomIDGenerator`
+        or a `CounterIDGenerator` from `kurt3.ids` makes them deterministic, and giving each worker its own
+        `prefix` keeps IDs from separate processes from colliding.
+        """
+        return self.__ids.generator
+
+    @id_generator.setter
+    def id_generator(self, value: IDGenerator):
+        self.__ids.generator = value
+
+    @property
+    def json_backend(self) -> JSONBackend:
+        """
+        The JSON library used to parse and serialize the project; see `kurt3.serialize`.
+        """
+        return self.__json_backend
+
     @property
     def targets(self):
         return self.__targets
@@ -116,6 +341,16 @@ class Project:
     def metadata(self):
         return self.__metadata
 
+    @property
+    def references(self) -> ReferenceIndex:
+        """
+        The index of which blocks and monitors use each variable, list and broadcast in the project.
+        Building it builds every target.
+        """
+        if self.__references is None:
+            self.__references = ReferenceIndex.build(self.__targets, self.__monitors)
+        return self.__references
+
     @property
     def stage(self):
         return self.targets.get_stage()
@@ -135,6 +370,30 @@ class Project:
                 output.extend(vars)
         return output
 
+    def blocks_by_opcode(self, opcode: str) -> list[Block]:
+        """
+        Return every block in the project with the given `opcode`, e.g. `event_whenbroadcastreceived`.
+        """
+        return self.__targets.blocks_by_opcode(opcode)
+
+    def opcode_counts(self) -> Counter[str]:
+        """
+        Return a histogram of how many blocks of each opcode the project contains.
+        """
+        return self.__targets.opcode_counts()
+
+    def find_usages(self, item: Variable | ScratchList | Broadcast) -> list[Block | Monitor]:
+        """
+        Return every block and monitor that uses the given variable, list or broadcast.
+        """
+        return self.references.usages(item)
+
+    def rename(self, item: Variable | ScratchList | Broadcast, name: str) -> None:
+        """
+        Rename a variable, list or broadcast, along with its name as it appears in every block and monitor that uses it.
+        """
+        self.references.rename(item, name)
+
     def get_sprite_by_name(self, name) -> Sprite:
         """
         Returns the sprite, if any, that corresponds to the given
@@ -146,80 +405,242 @@ class Project:
         if type(value) is not oftype:
             raise TypeError(f"{param_name} name must be a {str(oftype)}, but {value} of type {type(value)} was received.")
         
-    def add_costume(self, target: Target, file_path: str, name: str):
-        self._add_asset_check("File path", str, file_path)
+    def add_costume(self, target: Target, file_path: str | os.PathLike | bytes | BinaryIO, name: str, data_format: str = None):
+        """
+        Add a costume to `target`. Besides a file path, the image may be given in memory as a bytes-like or
+        binary file object, in which case its `data_format` (e.g. `svg` or `png`) must also be given.
+        """
         self._add_asset_check("Costume name", str, name)
 
-        if bool([c for c in target.costumes.costumes if c.name == name]):
+        if target.costumes.has_name(name):
             raise ValueError(f"The chosen costume name ({name}) already exists on this Target. Please choose a different one.")
         
-        self._check_file_path(file_path)
-        
-        if file_path not in self._assets:
-            self._add_asset(file_path)
-
-        md5, extension = self._assets[file_path]
-        target.costumes._add(md5, name, extension)
+        md5, extension = self._resolve_asset(file_path, data_format)
+        target.costumes._add(md5, name, extension, **self._costume_metadata(md5, extension))
 
-    def add_sound(self, target: Target, file_path: str, name: str):
-        self._add_asset_check("File path", str, file_path)
+    def add_sound(self, target: Target, file_path: str | os.PathLike | bytes | BinaryIO, name: str, data_format: str = None):
+        """
+        Add a sound to `target`. Besides a file path, the audio may be given in memory as a bytes-like or
+        binary file object, in which case its `data_format` (e.g. `wav` or `mp3`) must also be given.
+        """
         self._add_asset_check("Sound name", str, name)
-      
-        self._check_file_path(file_path)
         
-        if file_path not in self._assets:
-            self._add_asset(file_path)
-        
-        if bool([s for s in target.sounds.sounds if s.name == name]):
+        if target.sounds.has_name(name):
             raise ValueError(f"The chosen sound name ({name}) already exists on this Target. Please choose a different one.")
 
-        md5, extension = self._assets[file_path]
-        target.sounds._add(md5, extension, name)
+        md5, extension = self._resolve_asset(file_path, data_format)
+        target.sounds._add(md5, extension, name, **self._sound_metadata(md5, extension))
+
+    def add_costumes(self, entries: Iterable[tuple[Target, str, str]], max_workers: int = None):
+        """
+        Add many costumes at once, given as `(target, file_path, name)` entries. Every entry is validated
+        before anything is added, the files are hashed concurrently by up to `max_workers` threads,
+        and then all of the costumes are added together.
+        """
+        entries = self._check_bulk_entries(entries, "Costume", lambda target: target.costumes)
+        self._add_assets([file_path for target, file_path, name in entries], max_workers)
+
+        for target, file_path, name in entries:
+            md5, extension = self._assets[file_path]
+            target.costumes._add(md5, name, extension, **self._costume_metadata(md5, extension))
+
+    def add_sounds(self, entries: Iterable[tuple[Target, str, str]], max_workers: int = None):
+        """
+        Add many sounds at once, given as `(target, file_path, name)` entries. Every entry is validated
+        before anything is added, the files are hashed concurrently by up to `max_workers` threads,
+        and then all of the sounds are added together.
+        """
+        entries = self._check_bulk_entries(entries, "Sound", lambda target: target.sounds)
+        self._add_assets([file_path for target, file_path, name in entries], max_workers)
+
+        for target, file_path, name in entries:
+            md5, extension = self._assets[file_path]
+            target.sounds._add(md5, extension, name, **self._sound_metadata(md5, extension))
+
+    def _check_bulk_entries(self, entries, kind: str, manager_of: Callable) -> list[tuple[Target, str, str]]:
+        entries = list(entries)
+        names = set()
+        for target, file_path, name in entries:
+            self._add_asset_check("File path", str, file_path)
+            self._add_asset_check(f"{kind} name", str, name)
+
+            if manager_of(target).has_name(name) or (id(target), name) in names:
+                raise ValueError(f"The chosen {kind.lower()} name ({name}) already exists on this Target. Please choose a different one.")
+            names.add((id(target), name))
+        return entries
 
     def create_sprite(self, name: str):
         """
         Create and return a `Sprite` that is added to the project.
         """
-        s = Sprite(name=name, layerOrder=self._get_highest_layer()+1)
+        s = Sprite(name=name, layerOrder=self._get_highest_layer()+1, block_storage=self.__block_storage)
         self.targets._add_sprite(s)
         return s
 
+    def remove_sprite(self, sprite: Sprite):
+        """
+        Remove a `Sprite` from the project. Sprites in front of it each move one layer back.
+        """
+        self.targets._remove_sprite(sprite)
+
     def _run_presave_compatibility_check(self):
         """
         Ensure that the project is correctly configured so as to guarantee importability
         in Scratch.
         """
-        for target in self.__targets:
-            # All sprites require at least one costume for the project to be valid.
-            if len(target.costumes) == 0:
-                # Add the "cat" costume to costumeless sprites
-                self.add_costume(target, "../assets/cat1.svg", "costume1")
+        # All sprites require at least one costume for the project to be valid.
+        for target in self.__targets._without_costumes():
+            # Add the "cat" costume to costumeless sprites
+            self.add_costume(target, os.path.join(ASSETS_PATH, "cat1.svg"), "costume1")
         
-    def save(self, file_path: str = "project.sb3"):
+    def save(self, file_path: str | os.PathLike | BinaryIO = "project.sb3", prune: bool = True, compression: CompressionPolicy = DEFAULT_COMPRESSION, max_workers: int = None) -> SaveReport:
         """
         Output the project as a file, with the optional `file_path` attribute to specify where to save to.
-        The default filename is `project.sb3`.
+        The default filename is `project.sb3`. `file_path` may instead be a writable binary file object,
+        such as a `BytesIO`, which the project is written straight into.
+        Unless `prune` is `False`, only the assets that some costume or sound still refers to are saved;
+        the returned `SaveReport` lists any that were left out and how many bytes that saved.
+        Members are compressed according to the `compression` policy (see `kurt3.archive`), by up to
+        `max_workers` threads at once. Unchanged members of the original project that are already compressed
+        the way the policy asks are copied across without being recompressed.
         """
-        if not os.path.exists(self.__tmp_dir_name):
+        if self.__archive is None:
             raise IOError("Project file already closed; please save the project inside the with-block.")
 
-        self._check_file_path(file_path)
+        if isinstance(file_path, os.PathLike):
+            file_path = os.fspath(file_path)
+        if type(file_path) is str:
+            self._check_file_path(file_path)
+        elif not hasattr(file_path, "write"):
+            raise TypeError(f"Project must be saved to a file path or binary file object, but {file_path} of type {type(file_path)} was received.")
+        elif file_path is self.__source:
+            raise ValueError("A project cannot be saved into the same file object that it is being read from.")
         self._run_presave_compatibility_check()
 
-        for file, (md5_name, extension) in self._assets.items():
-            shutil.copy(file, f"{os.path.join(self.__tmp_dir_name, md5_name + extension)}")
+        referenced = self._referenced_assets()
+        keep = (lambda member: member in referenced) if prune else (lambda member: True)
+        dropped = []
+        bytes_saved = 0
+
+        # Members to be freshly compressed, as (name, function returning the member's data)
+        to_compress = []
+        to_copy = []
+
+        new_members = set()
+        for member, data in self._asset_data.items():
+            if keep(member):
+                to_compress.append((member, lambda data=data: data))
+            else:
+                dropped.append(member)
+                bytes_saved += len(data)
+            new_members.add(member)
+
+        for member, file in self._asset_paths.items():
+            if member in new_members:
+                continue
+            if keep(member):
+                to_compress.append((member, lambda file=file: Project._read_file(file)))
+            else:
+                dropped.append(member)
+                bytes_saved += os.path.getsize(file)
+            new_members.add(member)
+
+        for info in self.__archive.infolist():
+            if info.filename == "project.json" or info.filename in new_members:
+                continue
+            if not keep(info.filename):
+                dropped.append(info.filename)
+                bytes_saved += info.file_size
+            elif info.compress_type == compression.for_member(info.filename)[0]:
+                to_copy.append(info)
+            else:
+                to_compress.append((info.filename, lambda info=info: self.__archive.read(info)))
 
-        with open(os.path.join(self.__tmp_dir_name, "project.json"), mode="w") as project_file:
-            project_file.write(JSON.dumps(self.output()))
+        if type(file_path) is not str:
+            self._write_archive(file_path, to_compress, to_copy, compression, max_workers)
+            return SaveReport(dropped, bytes_saved)
+
+        # Write to a sibling file first, as the destination may well be the source archive that is still being read from.
+        partial_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        try:
+            self._write_archive(partial_path, to_compress, to_copy, compression, max_workers)
+            self._replace_source(partial_path, file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        return SaveReport(dropped, bytes_saved)
+
+    def _write_archive(self, destination: str | BinaryIO, to_compress: list, to_copy: list[zipfile.ZipInfo], compression: CompressionPolicy, max_workers: int) -> None:
+        # In deterministic mode, timestamps are fixed too so that saving the same project twice gives identical files
+        date_time = FIXED_DATE_TIME if self.__deterministic else time.localtime(time.time())[:6]
+        # project.json is compressed with the archive's own method and level, as it is the only member zipfile compresses
+        json_compression, json_level = compression.for_member("project.json")
+        with zipfile.ZipFile(destination, "w", json_compression, compresslevel=json_level) as zip_ref, ThreadPoolExecutor(max_workers) as pool:
+            compressed = [
+                pool.submit(lambda name, load: compress_member(name, load(), *compression.for_member(name), date_time), name, load)
+                for name, load in to_compress
+            ]
+
+            # project.json is encoded a piece at a time straight into the archive, rather than as one string.
+            # Members opened by name are dated to the earliest zip timestamp, so it is the same in every save.
+            with zip_ref.open("project.json", mode="w") as project_json:
+                write_json(self._lazy_output(), project_json, self.__json_backend)
+
+            # Members that are unchanged since the project was opened are copied across still compressed,
+            # while the rest are compressed in the background.
+            for info in to_copy:
+                copy_member_raw(self.__archive, zip_ref, info)
+            for future in compressed:
+                write_raw_member(zip_ref, *future.result())
+
+            if self.__deterministic:
+                # Otherwise zipfile records which system each member was made on, which differs on Windows;
+                # it is only written in the central directory, when the archive is closed.
+                for info in zip_ref.infolist():
+                    info.create_system = FIXED_CREATE_SYSTEM
+
+    @staticmethod
+    def _read_file(file_path: str) -> bytes:
+        with open(file_path, mode="rb") as file:
+            return file.read()
+
+    def _referenced_assets(self) -> set[str]:
+        """
+        The `md5ext` of every asset used by a costume or sound of any target.
+        """
+        return self.__targets._asset_names()
+
+    def _replace_source(self, partial_path: str, file_path: str) -> None:
+        """
+        Move a finished save into place. If that overwrites the project's own source file,
+        the archive is reopened so that the project can continue to be read from and saved.
+        """
+        overwrites_source = type(self.__source) is str and os.path.exists(file_path) and os.path.samefile(file_path, self.__source)
+        if overwrites_source:
+            self.__archive.close()
+        
+        os.replace(partial_path, file_path)
 
-        with zipfile.ZipFile(file_path, "w") as zip_ref:
-            for file in os.listdir(self.__tmp_dir_name):
-                zip_ref.write(os.path.join(self.__tmp_dir_name, file), file)
+        if overwrites_source:
+            self.__archive = zipfile.ZipFile(self.__source, "r")
+
+    def _lazy_output(self) -> LazyObject:
+        """
+        The same as `output`, except that each target's blocks are only serialized as they are written out.
+        """
+        return LazyObject(lambda: {
+            "targets": self.__targets._lazy_output(),
+            "monitors": self.__monitors.output(),
+            "extensions": self.__extensions.output(),
+            "meta": self.__metadata.output()
+        }.items())
 
     def output(self) -> dict:
         """ Returns a new project.json-compatible output dictionary from the project data.
             This contains the properties of a Scratch project, namely `targets`, `monitors`,
-            `extensions`, and `meta`.
+            `extensions`, and `meta`. The output of targets that have not changed since it was
+            last built is reused, so the dictionary returned must not be modified.
         """
         return {
             "targets": self.__targets.output(),
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from kurt3.block import Block
+from kurt3.broadcast import Broadcast
+from kurt3.lists import ScratchList
+from kurt3.monitor import Monitor
+from kurt3.variable import Variable
+
+if TYPE_CHECKING:
+    from kurt3.monitor import MonitorManager
+    from kurt3.target import TargetManager
+
+# Input primitives that name a broadcast, variable or list take the form [type, name, ID].
+BROADCAST_PRIMITIVE = 11
+VARIABLE_PRIMITIVE = 12
+LIST_PRIMITIVE = 13
+REFERENCE_PRIMITIVES = (BROADCAST_PRIMITIVE, VARIABLE_PRIMITIVE, LIST_PRIMITIVE)
+
+# Fields that name a broadcast, variable or list take the form [name, ID].
+REFERENCE_FIELDS = ("BROADCAST_OPTION", "VARIABLE", "LIST")
+
+class ReferenceIndex:
+    """
+    Records which blocks and monitors use each variable, list and broadcast, keyed by the ID of the
+    variable, list or broadcast. It is built in a single pass over the project when it is first needed, and
+    kept up to date as blocks are added and removed.
+    """
+
+    def __init__(self) -> None:
+        self.__usages: dict[str, dict[Block | Monitor, None]] = {}
+
+    @staticmethod
+    def build(targets: TargetManager, monitors: MonitorManager) -> ReferenceIndex:
+        index = ReferenceIndex()
+        for monitor in monitors.monitors:
+            if monitor.opcode in ("data_variable", "data_listcontents"):
+                index.__usages.setdefault(monitor.id, {})[monitor] = None
+        targets._attach_references(index)
+        return index
+
+    def usages(self, item: Variable | ScratchList | Broadcast | str) -> list[Block | Monitor]:
+        """
+        Return the blocks and monitors that use a variable, list or broadcast (or the one with the given ID).
+        """
+        return list(self.__usages.get(ReferenceIndex._key(item), {}))
+
+    def is_used(self, item: Variable | ScratchList | Broadcast | str) -> bool:
+        """
+        Whether any block or monitor uses the given variable, list or broadcast.
+        """
+        return bool(self.__usages.get(ReferenceIndex._key(item)))
+
+    def rename(self, item: Variable | ScratchList | Broadcast, name: str) -> None:
+        """
+        Rename a variable, list or broadcast, updating the name stored alongside its ID in every block and
+        monitor that uses it. This only visits those usages, rather than the whole project.
+        """
+        item.name = name
+        for user in self.__usages.get(item._id, {}):
+            # Values are replaced with renamed copies, as output handed out earlier may share them
+            if isinstance(user, Monitor):
+                user._rename(name)
+                continue
+
+            for field, value in list(user._field_values().items()):
+                if field in REFERENCE_FIELDS and len(value) > 1 and value[1] == item._id:
+                    user._set_field(field, [name, *value[1:]])
+            for input, value in list(user._input_values().items()):
+                if any(primitive[2] == item._id for primitive in input_primitives(value)):
+                    user._set_input(input, renamed_primitives(value, item._id, name))
+
+    def _add_block(self, block: Block) -> None:
+        for id in block_references(block):
+            self.__usages.setdefault(id, {})[block] = None
+
+    def _remove_block(self, block: Block) -> None:
+        for id in block_references(block):
+            users = self.__usages.get(id, {})
+            users.pop(block, None)
+            if not users:
+                self.__usages.pop(id, None)
+
+    @staticmethod
+    def _key(item: Variable | ScratchList | Broadcast | str) -> str:
+        if isinstance(item, (Variable, ScratchList, Broadcast)):
+            return item._id
+        return item
+
+def block_references(block: Block) -> set[str]:
+    """
+    Return the IDs of every variable, list and broadcast that `block` uses in its fields or inputs.
+    """
+    return value_references(block._field_values(), block._input_values())
+
+def value_references(fields: dict, inputs: dict) -> set[str]:
+    """
+    Return the IDs of every variable, list and broadcast named in a block's field and input values.
+    """
+    ids = set()
+    for field, value in fields.items():
+        if field in REFERENCE_FIELDS and len(value) > 1 and type(value[1]) is str:
+            ids.add(value[1])
+
+    for value in inputs.values():
+        for primitive in input_primitives(value):
+            ids.add(primitive[2])
+    return ids
+
+def renamed_primitives(value: list, id: str, name: str) -> list:
+    """
+    Return a copy of a block input's value in which the primitives that refer to `id` are given `name`.
+    """
+    return [value[0], *(
+        [item[0], name, *item[2:]] if type(item) is list and len(item) > 2 and item[0] in REFERENCE_PRIMITIVES and item[2] == id else item
+        for item in value[1:]
+    )]
+
+def input_primitives(value: list):
+    """
+    Yield the broadcast, variable and list primitives found in a block input's value.
+    The first element of the value is the shadow type; the rest may each be a block ID or a primitive.
+    """
+    for item in value[1:]:
+        if type(item) is list and len(item) > 2 and item[0] in REFERENCE_PRIMITIVES:
+            yield item
@@ -0,0 +1,182 @@
+from __future__ import annotations
+import json as JSON
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+WRITE_BUFFER_SIZE = 1 << 16
+
+class JSONBackend(ABC):
+    """
+    A JSON library that projects are parsed and serialized with. `item_separator` and `key_separator` are
+    the bytes the backend puts between items and after keys, so that documents written a piece at a time
+    (see `write_json`) match what `dumps` would produce in one go.
+    """
+    name = None
+    item_separator = b", "
+    key_separator = b": "
+
+    @abstractmethod
+    def loads(self, data: bytes):
+        ...
+
+    @abstractmethod
+    def dumps(self, value) -> bytes:
+        ...
+
+class StdlibJSON(JSONBackend):
+    """
+    Python's own `json` module, which is always available. Its output is the same on every machine, so
+    this is the backend used in deterministic mode. With `compact`, no whitespace is written.
+    """
+    name = "json"
+
+    def __init__(self, compact: bool = False) -> None:
+        separators = (",", ":") if compact else (", ", ": ")
+        self.__encoder = JSON.JSONEncoder(separators=separators)
+        self.item_separator, self.key_separator = (s.encode("utf-8") for s in separators)
+
+    def loads(self, data: bytes):
+        return JSON.loads(data)
+
+    def dumps(self, value) -> bytes:
+        return self.__encoder.encode(value).encode("utf-8")
+
+class OrjsonJSON(JSONBackend):
+    """
+    The `orjson` library, the fastest backend. Its output is always compact.
+    """
+    name = "orjson"
+    item_separator = b","
+    key_separator = b":"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("The orjson JSON backend requires the orjson package to be installed.")
+
+    def loads(self, data: bytes):
+        return orjson.loads(data)
+
+    def dumps(self, value) -> bytes:
+        return orjson.dumps(value)
+
+class UjsonJSON(JSONBackend):
+    """
+    The `ujson` library. Its output is always compact.
+    """
+    name = "ujson"
+    item_separator = b","
+    key_separator = b":"
+
+    def __init__(self) -> None:
+        if ujson is None:
+            raise ImportError("The ujson JSON backend requires the ujson package to be installed.")
+
+    def loads(self, data: bytes):
+        return ujson.loads(data)
+
+    def dumps(self, value) -> bytes:
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+def get_json_backend(backend: JSONBackend | str = None, deterministic: bool = False) -> JSONBackend:
+    """
+    Return a JSON backend, given either as a `JSONBackend` or by name: `orjson`, `ujson`, `json`, or `json-compact`.
+    By default, the fastest library installed is used (orjson, then ujson, then the standard library).
+    In `deterministic` mode the standard library is always used, with compact output, so that the same project
+    is written byte for byte the same way no matter which libraries are installed, so no backend can be chosen.
+    """
+    if deterministic:
+        if backend is not None:
+            raise ValueError("A JSON backend cannot be chosen in deterministic mode.")
+        return StdlibJSON(compact=True)
+
+    if isinstance(backend, JSONBackend):
+        return backend
+    if backend is None:
+        if orjson is not None:
+            return OrjsonJSON()
+        if ujson is not None:
+            return UjsonJSON()
+        return StdlibJSON(compact=True)
+
+    backends = {
+        "orjson": OrjsonJSON,
+        "ujson": UjsonJSON,
+        "json": StdlibJSON,
+        "json-compact": lambda: StdlibJSON(compact=True),
+    }
+    if backend not in backends:
+        raise ValueError(f"Unknown JSON backend {backend}; choose one of {', '.join(backends)}.")
+    return backends[backend]()
+
+def copy_json(value):
+    """
+    Return a deep copy of parsed JSON. As it only ever holds dicts, lists and immutable values,
+    this is several times cheaper than `copy.deepcopy`.
+    """
+    if type(value) is dict:
+        return {key: copy_json(item) for key, item in value.items()}
+    if type(value) is list:
+        return [copy_json(item) for item in value]
+    return value
+
+class LazyObject:
+    """
+    A JSON object whose members are only produced, by calling `items`, while it is being written out.
+    This lets large parts of a project (e.g. its blocks) be serialized one piece at a time.
+    """
+    def __init__(self, items: Callable[[], Iterable[tuple[str, Any]]]) -> None:
+        self.items = items
+
+class LazyArray:
+    """
+    A JSON array whose values are only produced, by calling `values`, while it is being written out.
+    """
+    def __init__(self, values: Callable[[], Iterable[Any]]) -> None:
+        self.values = values
+
+def iter_encode(value, backend: JSONBackend) -> Iterator[bytes]:
+    """
+    Encode `value`, which may contain `LazyObject`s and `LazyArray`s at any depth, as JSON in chunks.
+    """
+    item_separator, key_separator = backend.item_separator, backend.key_separator
+    if isinstance(value, LazyObject):
+        yield b"{"
+        for i, (key, item) in enumerate(value.items()):
+            yield (item_separator if i else b"") + backend.dumps(key) + key_separator
+            yield from iter_encode(item, backend)
+        yield b"}"
+    elif isinstance(value, LazyArray):
+        yield b"["
+        for i, item in enumerate(value.values()):
+            if i:
+                yield item_separator
+            yield from iter_encode(item, backend)
+        yield b"]"
+    else:
+        yield backend.dumps(value)
+
+def write_json(value, stream: BinaryIO, backend: JSONBackend) -> None:
+    """
+    Write `value` to a binary `stream` as UTF-8 JSON, a buffer's worth at a time, so that the full document
+    never needs to be held in memory at once.
+    """
+    buffer = []
+    buffered = 0
+    for chunk in iter_encode(value, backend):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= WRITE_BUFFER_SIZE:
+            stream.write(b"".join(buffer))
+            buffer.clear()
+            buffered = 0
+    stream.write(b"".join(buffer))
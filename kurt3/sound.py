@@ -1,11 +1,15 @@
 from hashlib import md5
 import os
 from kurt3.asset import Asset
+from kurt3.subject import Manager
 
 
-class SoundManager:
+class SoundManager(Manager):
     def __init__(self, sound_list: list[dict]) -> None:
         self.__sounds = [Sound(s) for s in sound_list]
+        self.__names = {s.name for s in self.__sounds}
+        for s in self.__sounds:
+            s._manager = self
 
     @property
     def sounds(self):
@@ -14,23 +18,35 @@ class SoundManager:
         """
         return self.__sounds
 
-    def _add(self, md5_hash: str, extension: str, name: str):
-        self.__sounds.append(Sound(
+    def has_name(self, name: str) -> bool:
+        """
+        Whether this target already has a sound called `name`.
+        """
+        return name in self.__names
+
+    def _add(self, md5_hash: str, extension: str, name: str, rate = 0, sample_count = 0, format = ""):
+        sound = Sound(
             {
                 "assetId": md5_hash,
                 "name": name,
                 "md5ext": md5_hash + extension,
                 "dataFormat": extension[1:],
-                "format": "",
-                "rate": 0,
-                "sampleCount": 0
-            })
+                "format": format,
+                "rate": rate,
+                "sampleCount": sample_count
+            }
         )
+        sound._manager = self
+        self.__sounds.append(sound)
+        self.__names.add(name)
+        self._changed()
 
     def output(self):
         return [s.output() for s in self.__sounds]
     
 class Sound(Asset):
+    __slots__ = ("__format", "__rate", "__sample_count")
+
     def __init__(self, values: dict) -> None:
         super().__init__(values)
         self.__format = values["format"]
@@ -61,6 +77,7 @@ class Sound(Asset):
 
         if 0 < value <= 192000:
             self.__rate = value
+            self._changed()
         else:
             raise ValueError(f"Sample rate ({value} must be between 1 and 192000Hz inclusive.")
 
@@ -1,14 +1,31 @@
 from __future__ import annotations
 import random
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from kurt3.ids import IDRegistry
 
 class Manager:
-    pass
+    __slots__ = ()
+    _owner = None # The object whose output includes this manager's, which is told whenever its items change
+
+    def _changed(self) -> None:
+        if self._owner is not None:
+            self._owner._changed()
 
 class Subject:
+    # Model classes declare their attributes in __slots__, as projects can hold very many of them
+    __slots__ = ()
+
     def output(self):
         pass
 
+    def _changed(self) -> None:
+        """
+        Called whenever the subject changes in a way that alters its output, so that any output cached from it is rebuilt.
+        """
+        pass
+
     def _validate_num(self, lower_bound, upper_bound, action: Callable, value, property_name) -> None:
         if type(value) in (int, float):
             if lower_bound <= value <= upper_bound:
@@ -27,31 +44,126 @@ class IDObjectManager(Manager):
     on the type of object generated. The fact, however, is that all of these managers fundamentally work in the same
     way, so this part of the class can be "factored out" of all of them, allowing them all to inherit from it here.
     """
+    __slots__ = ("_index", "_registry", "_owner")
 
     def __init__(self, subtype: type[IDObject] | Callable, dictionary: dict) -> None:
-        self._items = [subtype(key, dictionary[key]) for key in dictionary]
+        # Items are indexed by their ID; dictionaries keep insertion order, so output order is preserved.
+        self._index: dict[str, IDObject] = {}
+        self._registry: IDRegistry = None
+        self._owner = None
+        for key in dictionary:
+            self._add(subtype(key, dictionary[key]))
+
+    def __iter__(self):
+        return iter(self._index.values())
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, id) -> bool:
+        return id in self._index
+
+    @property
+    def _items(self) -> list[IDObject]:
+        return list(self._index.values())
+
+    def by_id(self, id) -> IDObject:
+        """
+        Get the value that corresponds to a given `id`.
+        """
+        try:
+            return self._index[id]
+        except KeyError:
+            raise KeyError(f"No item with ID {id} exists.") from None
+
+    def _attach_registry(self, registry: IDRegistry) -> None:
+        """
+        Make this manager report the IDs of its items to a project-wide `IDRegistry`.
+        """
+        self._registry = registry
+        for id in self._index:
+            registry.add(id)
+
+    def _detach_registry(self) -> None:
+        """
+        Withdraw the IDs of this manager's items from the project-wide `IDRegistry`, e.g. once its target is removed.
+        """
+        for id in self._index:
+            self._registry.discard(id)
+        self._registry = None
+
+    def _generate_id(self) -> str:
+        if self._registry is None:
+            raise RuntimeError("IDs can only be generated once this manager belongs to an open project.")
+        return self._registry.generate_id()
+
+    def _add(self, item: IDObject) -> None:
+        if item._id in self._index:
+            raise ValueError(f"An item with ID {item._id} already exists.")
+        self._index[item._id] = item
+        item._manager = self
+        if self._registry is not None:
+            self._registry.add(item._id)
+        self._changed()
+
+    def _remove(self, item: IDObject) -> None:
+        del self._index[item._id]
+        item._manager = None
+        if self._registry is not None:
+            self._registry.discard(item._id)
+        self._changed()
 
     def output(self):
         # With this, subtypes (e.g. variables, lists, etc.) will only need to "output" their values;
         # the "key" part of the output is handled by the manager.
         return {
-            i._id: i.output() for i in self._items
+            id: i.output() for id, i in self._index.items()
         }
 
+    def _iter_output(self):
+        # The same as `output`, one item at a time
+        return ((id, i.output()) for id, i in self._index.items())
+
 class Searchable(IDObjectManager):
+    """
+    A manager whose items have names, which are indexed alongside their IDs.
+    Several items may share a name, e.g. a sprite's local variables and a global variable of the same name.
+    """
+
+    def __init__(self, subtype: type[IDObject] | Callable, dictionary: dict) -> None:
+        self._names: dict[str, dict[str, IDObject]] = {}
+        super().__init__(subtype, dictionary)
+
     def by_name(self, name) -> list[IDObject]:
         """
         Get the value that corresponds to a given `name`.
         """
-        return [i for i in self._items if i.name == name]
+        return list(self._names.get(name, {}).values())
+
+    def _add(self, item: IDObject) -> None:
+        super()._add(item)
+        self._names.setdefault(item.name, {})[item._id] = item
+
+    def _remove(self, item: IDObject) -> None:
+        super()._remove(item)
+        self._unindex_name(item, item.name)
 
-    def by_id(self, id):
+    def _renamed(self, item: IDObject, old_name: str) -> None:
         """
-        Get the value that corresponds to a given `id`.
+        Called by an item after its name changes, to keep the name index in sync.
         """
-        return [i for i in self._items if i.id == id][0]
+        self._unindex_name(item, old_name)
+        self._names.setdefault(item.name, {})[item._id] = item
+
+    def _unindex_name(self, item: IDObject, name: str) -> None:
+        named = self._names[name]
+        del named[item._id]
+        if not named:
+            del self._names[name]
 
 class HasXY(Subject):
+    __slots__ = ()
+
     @property
     def x(self) -> float:
         """
@@ -67,6 +179,7 @@ class HasXY(Subject):
             value,
             "x-coordinate"
         )
+        self._changed()
 
     @property
     def y(self) -> float:
@@ -83,8 +196,11 @@ class HasXY(Subject):
             value,
             "y-coordinate"
         )
+            self._changed()
 
 class HasWidthHeight(Subject):
+    __slots__ = ()
+
     @property
     def width(self) -> float:
         """
@@ -120,5 +236,12 @@ class HasWidthHeight(Subject):
         self._height = value
 
 class IDObject(Subject):
+    __slots__ = ("_id", "_manager")
+
     def __init__(self, id) -> None:
         self._id = id
+        self._manager: IDObjectManager = None # Set by the manager the object is added to
+
+    def _changed(self) -> None:
+        if self._manager is not None:
+            self._manager._changed()
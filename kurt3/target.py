@@ -1,51 +1,244 @@
 from __future__ import annotations
+from collections import Counter
+from typing import TYPE_CHECKING
 from kurt3.block import Block, BlockManager
 from kurt3.broadcast import BroadcastManager
 from kurt3.comment import CommentManager
 from kurt3.costume import Costume, CostumeManager
+from kurt3.ids import IDRegistry
 from kurt3.lists import ListManager
+from kurt3.serialize import LazyArray, LazyObject, copy_json
 from kurt3.sound import SoundManager
 from kurt3.subject import HasXY
 from kurt3.variable import VariableManager
 
+if TYPE_CHECKING:
+    from kurt3.references import ReferenceIndex
+
 
 class TargetManager:
     """
     Represents the list of all "targets" that belong to the project. A "target" is a general term
     for either the `Stage` or a `Sprite`.
+    Targets are kept as they were parsed, as `RawTarget`s, until they are first asked for, and only then made into
+    a `Stage` or `Sprite`; those that never are cost next to nothing and are saved exactly as they were parsed.
+    With `shared`, the parsed targets may be shared with other projects (e.g. forks of the same template), so are
+    copied before being made into targets rather than being used up in the process.
     """
-    def __init__(self, target_list) -> None:
-        self.__targets: list[Target] = [TargetManager._create_target(t) for t in target_list]
+    def __init__(self, target_list, block_storage: type[BlockManager] = BlockManager, shared: bool = False) -> None:
+        self.__targets: list[Target | RawTarget] = [RawTarget(t) for t in target_list]
+        # The position of each target in `__targets`, by `id()`, so that a target can be built in its place directly
+        self.__positions: dict[int, int] = {id(t): i for i, t in enumerate(self.__targets)}
+        self.__block_storage = block_storage
+        self.__shared = shared
+        self.__registry: IDRegistry = None
+        self.__references: ReferenceIndex = None
+
+        self.__stage: Stage | RawTarget = None
+        self.__sprites: dict[str, Sprite | RawTarget] = {} # Sprites indexed by name
+        for t in self.__targets:
+            self.__index(t)
+
+        # Targets from back to front, so that each target's position is its layer number
+        self.__layers: list[Target | RawTarget] = sorted(self.__targets, key=lambda t: t.layer)
+        if any(t.layer != i for i, t in enumerate(self.__layers)):
+            self.__renumber_layers(0)
+
+    def _attach_registry(self, registry: IDRegistry) -> None:
+        """
+        Register the IDs of every target's items with the project-wide `registry`, and keep
+        doing so for sprites added later on.
+        """
+        self.__registry = registry
+        for t in self.__targets:
+            t._attach_registry(registry)
 
     @staticmethod
-    def _create_target(target_dict: dict) -> Stage | Sprite:
+    def _create_target(target_dict: dict, block_storage: type[BlockManager] = BlockManager) -> Stage | Sprite:
         """
         Creates either a `Stage` or a `Sprite` object, depending on value of the
         `isStage` attribute.
         """
 
         if target_dict["isStage"]:
-            return Stage(**target_dict)
+            return Stage(**target_dict, block_storage=block_storage)
         else:
-            return Sprite(**target_dict)
-    
+            return Sprite(**target_dict, block_storage=block_storage)
+
+    def __materialize(self, raw: Target | RawTarget) -> Target:
+        """
+        Make a target that is still as it was parsed into a `Stage` or `Sprite`, in its place.
+        """
+        if not isinstance(raw, RawTarget):
+            return raw
+
+        # The parsed target is left as it is, as it may already have been handed out as output
+        values = copy_json(raw.values) if self.__shared else raw.values
+        target = TargetManager._create_target(values | {"layerOrder": raw.layer}, self.__block_storage)
+
+        position = self.__positions.pop(id(raw))
+        self.__targets[position] = target
+        self.__positions[id(target)] = position
+        self.__layers[target.layer] = target
+        self.__index(target)
+        if self.__registry is not None:
+            # The built target registers its own IDs in place of those registered from the parsed target
+            raw._detach_registry(self.__registry)
+            target._attach_registry(self.__registry)
+        if self.__references is not None:
+            target.blocks._attach_references(self.__references)
+        return target
+
+    def _attach_references(self, references: ReferenceIndex) -> None:
+        """
+        Record the blocks of every target, including sprites added later on, in the project-wide `references`.
+        Every target is built to do so.
+        """
+        self.__references = references
+        for t in list(self.__targets):
+            self.__materialize(t).blocks._attach_references(references)
+
     def _add_sprite(self, sprite):
+        if sprite.name in self.__sprites:
+            raise ValueError(f"A sprite with name {sprite.name} already exists.")
+
+        self.__positions[id(sprite)] = len(self.__targets)
         self.__targets.append(sprite)
+        self.__index(sprite)
+        # Slot the sprite in at its requested layer (above the stage), shifting any sprites in front of it forward
+        position = min(max(sprite.layer, 1), len(self.__layers))
+        self.__layers.insert(position, sprite)
+        self.__renumber_layers(position)
+
+        if self.__registry is not None:
+            sprite._attach_registry(self.__registry)
+        if self.__references is not None:
+            sprite.blocks._attach_references(self.__references)
+
+    def _remove_sprite(self, sprite):
+        if self.__sprites.get(sprite.name) is not sprite:
+            raise NameError(f"The sprite with name {sprite.name} does not belong to this project.")
+
+        removed = self.__positions.pop(id(sprite))
+        del self.__targets[removed]
+        for i in range(removed, len(self.__targets)):
+            self.__positions[id(self.__targets[i])] = i
+        del self.__sprites[sprite.name]
+        sprite._manager = None
+        position = sprite.layer
+        del self.__layers[position]
+        self.__renumber_layers(position)
+
+        if self.__registry is not None:
+            sprite._detach_registry()
+        if self.__references is not None:
+            sprite.blocks._detach_references()
+
+    def _renamed(self, target: Target, old_name: str) -> None:
+        """
+        Called by a target after its name changes, to keep the name index in sync.
+        """
+        if not target.is_stage:
+            del self.__sprites[old_name]
+            self.__sprites[target.name] = target
+
+    def __index(self, target: Target | RawTarget) -> None:
+        if not isinstance(target, RawTarget):
+            target._manager = self
+        if target.is_stage:
+            self.__stage = target
+        else:
+            self.__sprites[target.name] = target
+
+    def __renumber_layers(self, start: int, end: int = None) -> None:
+        for i in range(start, len(self.__layers) if end is None else end):
+            self.__layers[i]._set_layer(i)
+
+    @property
+    def highest_layer(self) -> int:
+        """
+        The layer of the frontmost target.
+        """
+        return self.__layers[-1].layer
+
+    @property
+    def layers(self) -> list[Target]:
+        """
+        The project's targets from back to front, starting with the stage.
+        """
+        return [self.__materialize(t) for t in list(self.__layers)]
+
+    def move_layers(self, sprite: Sprite, n: int) -> None:
+        """
+        Move a sprite `n` layers forward, or backward if `n` is negative. Sprites cannot be moved behind the stage;
+        the move stops at the front or back if `n` would go past either.
+        """
+        if sprite.is_stage or not 0 < sprite.layer < len(self.__layers) or self.__layers[sprite.layer] is not sprite:
+            raise NameError(f"The sprite with name {sprite.name} does not belong to this project.")
+        old = sprite.layer
+        new = min(max(old + n, 1), len(self.__layers) - 1)
+        if old == new:
+            return
+        del self.__layers[old]
+        self.__layers.insert(new, sprite)
+        self.__renumber_layers(min(old, new), max(old, new) + 1)
+
+    def go_to_front(self, sprite: Sprite) -> None:
+        """
+        Move a sprite in front of every other sprite.
+        """
+        self.move_layers(sprite, len(self.__layers))
+
+    def go_to_back(self, sprite: Sprite) -> None:
+        """
+        Move a sprite behind every other sprite, though still in front of the stage.
+        """
+        self.move_layers(sprite, -len(self.__layers))
 
     def get_stage(self):
-        try:
-            return [t for t in self.__targets if t.is_stage][0]
-        except IndexError:
+        if self.__stage is None:
             raise NameError("Stage object does not exist.")
+        return self.__materialize(self.__stage)
 
     def get_sprite_by_name(self, name) -> Target:
         try:
-            return [t for t in self.__targets if t.name == name and not t.is_stage][0]
-        except:
+            return self.__materialize(self.__sprites[name])
+        except KeyError:
             raise NameError(f"The sprite with name {name} does not exist.")
 
+    def blocks_by_opcode(self, opcode: str) -> list[Block]:
+        """
+        Return every block with the given `opcode` across all targets. Only targets that have such a block are built.
+        """
+        return [
+            b for t in list(self.__targets)
+            if not isinstance(t, RawTarget) or opcode in t.opcode_counts()
+            for b in self.__materialize(t).blocks.by_opcode(opcode)
+        ]
+
+    def opcode_counts(self) -> Counter[str]:
+        """
+        Return the number of blocks of each opcode across all targets.
+        """
+        counts = Counter()
+        for t in self.__targets:
+            counts.update(t.opcode_counts() if isinstance(t, RawTarget) else t.blocks.opcode_counts())
+        return counts
+
+    def _without_costumes(self) -> list[Target]:
+        """
+        The targets that have no costumes at all.
+        """
+        return [self.__materialize(t) for t in list(self.__targets) if t.costume_count == 0]
+
+    def _asset_names(self) -> set[str]:
+        """
+        The `md5ext` of every asset used by a costume or sound of any target.
+        """
+        return {name for t in self.__targets for name in t._asset_names()}
+
     def __iter__(self):
-        return iter(self.__targets)
+        return (self.__materialize(t) for t in list(self.__targets))
 
     def __len__(self):
         return len(self.__targets)
@@ -53,6 +246,75 @@ class TargetManager:
     def output(self):
         return [t.output() for t in self.__targets]
 
+    def _lazy_output(self) -> LazyArray:
+        return LazyArray(lambda: (t.output() if isinstance(t, RawTarget) else t._lazy_output() for t in self.__targets))
+
+class RawTarget:
+    """
+    A target exactly as it was parsed from project.json, standing in for its `Stage` or `Sprite` until that is
+    first needed. Its parsed values are never modified, so they can be saved as they are.
+    """
+    __slots__ = ("__values", "__layer", "__opcode_counts")
+
+    def __init__(self, values: dict) -> None:
+        self.__values = values
+        self.__layer = values.get("layerOrder")
+        self.__opcode_counts: Counter[str] = None
+
+    @property
+    def values(self) -> dict:
+        """
+        The target as it was parsed.
+        """
+        return self.__values
+
+    @property
+    def name(self) -> str:
+        return self.__values["name"]
+
+    @property
+    def is_stage(self) -> bool:
+        return self.__values["isStage"]
+
+    @property
+    def layer(self) -> int:
+        return self.__layer
+
+    def _set_layer(self, value: int) -> None:
+        # Kept apart from the parsed values, which may be shared
+        self.__layer = value
+
+    @property
+    def costume_count(self) -> int:
+        return len(self.__values.get("costumes", ()))
+
+    def _asset_names(self) -> list[str]:
+        return [asset["md5ext"] for key in ("costumes", "sounds") for asset in self.__values.get(key, ())]
+
+    def opcode_counts(self) -> Counter[str]:
+        """
+        The number of blocks of each opcode, counted once; the returned `Counter` must not be modified.
+        """
+        if self.__opcode_counts is None:
+            self.__opcode_counts = Counter(block["opcode"] for block in self.__values.get("blocks", {}).values())
+        return self.__opcode_counts
+
+    def _attach_registry(self, registry: IDRegistry) -> None:
+        # The IDs are registered straight from the parsed target, without building anything
+        for key in ("blocks", "broadcasts", "variables", "lists", "comments"):
+            for id in self.__values.get(key, ()):
+                registry.add(id)
+
+    def _detach_registry(self, registry: IDRegistry) -> None:
+        for key in ("blocks", "broadcasts", "variables", "lists", "comments"):
+            for id in self.__values.get(key, ()):
+                registry.discard(id)
+
+    def output(self) -> dict:
+        if self.__layer == self.__values.get("layerOrder"):
+            return self.__values
+        return self.__values | {"layerOrder": self.__layer}
+
 class Target:
     """
     Represents a single "target", either a `Stage` or a `Sprite`. As a base class, this is not sufficient
@@ -71,6 +333,7 @@ class Target:
         sounds = [],
         layerOrder = None,
         volume = 100,
+        block_storage: type[BlockManager] = BlockManager, # Or the columnar `BlockTable`
     ) -> None:
         self.__is_stage = isStage
         self.__name = name
@@ -79,7 +342,7 @@ class Target:
         self.__variables = VariableManager(variables)
         self.__lists = ListManager(lists)
         self.__broadcasts = BroadcastManager(broadcasts)
-        self.__blocks = BlockManager(blocks)
+        self.__blocks = block_storage(blocks)
         self._comments = CommentManager(comments)
         self.__current_costume = currentCostume
         self.__costumes = CostumeManager(costumes)
@@ -88,6 +351,23 @@ class Target:
         if layerOrder is None:
             raise Warning("Layer order was not assigned to target, saving cannot commence until a unique layer is selected.")
         self.__volume = volume
+        self._manager: TargetManager = None # Set by the manager the target is added to
+
+        # The target's output is kept until something in it changes, which its managers report back
+        self.__output: dict = None
+        for manager in (self.__blocks, self.__variables, self.__lists, self.__broadcasts, self._comments, self.__costumes, self.__sounds):
+            manager._owner = self
+
+    def _changed(self) -> None:
+        self.__output = None
+
+    def _attach_registry(self, registry: IDRegistry) -> None:
+        for manager in (self.__blocks, self.__broadcasts, self.__variables, self.__lists, self._comments):
+            manager._attach_registry(registry)
+
+    def _detach_registry(self) -> None:
+        for manager in (self.__blocks, self.__broadcasts, self.__variables, self.__lists, self._comments):
+            manager._detach_registry()
 
     @property
     def is_stage(self):
@@ -102,7 +382,19 @@ class Target:
     @name.setter
     def name(self, value: str):
         if type(value) is str:
+            if self._manager is not None and not self.__is_stage and value != self.__name:
+                try:
+                    self._manager.get_sprite_by_name(value)
+                except NameError:
+                    pass
+                else:
+                    raise ValueError(f"A sprite with name {value} already exists.")
+
+            old_name = self.__name
             self.__name = value
+            if self._manager is not None:
+                self._manager._renamed(self, old_name)
+            self._changed()
         else:
             raise TypeError(f"Variable name must be a string, but {value} of type {type(value)} was received.")
     
@@ -156,6 +448,7 @@ class Target:
         upper_bound = len(self.__costumes.costumes)
         if 0 < value <= upper_bound:
             self.__current_costume = value
+            self._changed()
         else:
             raise ValueError(f"Costume number ({value}) out of range: must be between 1 and {upper_bound} inclusive.")
 
@@ -172,6 +465,13 @@ class Target:
         The sounds that belong to this target.
         """
         return self.__sounds
+
+    @property
+    def costume_count(self) -> int:
+        return len(self.__costumes)
+
+    def _asset_names(self) -> list[str]:
+        return [asset.md5_with_extension for assets in (self.__costumes.costumes, self.__sounds.sounds) for asset in assets]
     
     @property
     def layer(self) -> int:
@@ -181,6 +481,11 @@ class Target:
         """
         return self.__layer_order
 
+    def _set_layer(self, value: int) -> None:
+        if value != self.__layer_order:
+            self.__layer_order = value
+            self._changed()
+
     @property
     def volume(self) -> float:
         """
@@ -202,14 +507,48 @@ class Target:
         else:
             return blocks[0]
 
+    def remove_block(self, blocks: Block | list[Block]) -> None:
+        """
+        Remove a block, or several, from this target, along with everything attached below or inside them.
+        """
+        try:
+            blocks = list(blocks)
+        except TypeError:
+            blocks = [blocks]
+
+        for block in blocks:
+            if block._manager is not self.__blocks:
+                continue # Already removed as part of an earlier block's script
+            if (parent := block.parent) is not None:
+                parent._detach_child(block._id)
+            self.__blocks._remove_block(*list(block.walk()))
+
     def output(self) -> dict:
+        """
+        The target as it appears in project.json. Until the target or anything in it changes, the same output
+        is handed out again rather than rebuilt, so it must not be modified.
+        """
+        if self.__output is None:
+            self.__output = self._output(self.__blocks.output())
+        return self.__output
+
+    def _lazy_output(self) -> LazyObject | dict:
+        """
+        The target's output, but with its blocks only serialized one at a time as they are written out,
+        unless its output is already at hand.
+        """
+        if self.__output is not None:
+            return self.__output
+        return LazyObject(lambda: self._output(LazyObject(self.__blocks._iter_output)).items())
+
+    def _output(self, blocks) -> dict:
         return {
             "isStage": self.__is_stage,
             "name": self.__name,
             "variables": self.__variables.output(),
             "lists": self.__lists.output(),
             "broadcasts": self.__broadcasts.output(),
-            "blocks": self.__blocks.output(),
+            "blocks": blocks,
             "comments": self._comments.output(),
             "currentCostume": self.__current_costume,
             "costumes": self.__costumes.output(),
@@ -267,8 +606,8 @@ class Stage(Target):
         """
         return self.__tts_language
     
-    def output(self) -> dict:
-        return super().output() | {
+    def _output(self, blocks) -> dict:
+        return super()._output(blocks) | {
                 "tempo": self.__tempo,
                 "videoTransparency": self.__video_transparency,
                 "videoState": self.__video_state,
@@ -332,8 +671,8 @@ class Sprite(Target, HasXY):
         """
         return self.__rotation_style
 
-    def output(self) -> dict:
-        return super().output() | {
+    def _output(self, blocks) -> dict:
+        return super()._output(blocks) | {
                 "visible": self.__visible,
                 "x": self._x,
                 "y": self._y,
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import io
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import NamedTuple
+
+from kurt3.project import Project
+from kurt3.serialize import copy_json, get_json_backend
+
+class Template(NamedTuple):
+    modified: tuple[int, int] # The file's modification time and size when it was read, to tell when it has changed
+    data: bytes # The whole .sb3 archive, which every fork reads its assets from
+    parsed_json: dict # project.json as parsed when the template was read; never handed out directly
+
+class TemplateCache:
+    """
+    Keeps base projects read and parsed in memory, so that many projects can be forked from them without
+    each one reading its file and parsing its project.json again. Up to `max_templates` are kept, after which
+    the least recently used is forgotten. A template is read again if its file changes on disk.
+    The cache can be shared between threads.
+    """
+
+    def __init__(self, max_templates: int = 16) -> None:
+        if type(max_templates) is not int or max_templates < 1:
+            raise ValueError(f"Maximum number of templates must be a positive integer, but {max_templates} was received.")
+        self.__max_templates = max_templates
+        self.__templates: OrderedDict[str, Template] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__templates)
+
+    def __contains__(self, file_path: str) -> bool:
+        return os.path.abspath(file_path) in self.__templates
+
+    @property
+    def max_templates(self) -> int:
+        """
+        The number of templates kept before the least recently used is forgotten.
+        """
+        return self.__max_templates
+
+    def fork(self, file_path: str, **project_options) -> Project:
+        """
+        Return a new `Project` based on the template at `file_path`, which can be opened and saved like any other
+        (e.g. in a with-block). Its assets are read from the template's archive in memory, shared by every fork,
+        and its project.json comes from the already parsed template. Targets are shared with the template until a fork
+        first uses them, when that fork gets its own copy, so changes to a fork never affect the template.
+        `project_options` are passed on to `Project`.
+        """
+        template = self.get(file_path)
+        project = Project(template.data, **project_options)
+        project._set_template(lambda: TemplateCache._parsed_json(template))
+        return project
+
+    def get(self, file_path: str) -> Template:
+        """
+        Return the template at `file_path`, reading it first if it is not cached or its file has changed.
+        """
+        if type(file_path) is not str:
+            raise TypeError(f"Template path must be a string, but {file_path} of type {type(file_path)} was received.")
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        modified = (stat.st_mtime_ns, stat.st_size)
+
+        with self.__lock:
+            if (template := self.__templates.get(key)) is not None and template.modified == modified:
+                self.__templates.move_to_end(key)
+                return template
+
+        # Read outside the lock, so that other templates can be fetched meanwhile
+        template = TemplateCache._read(key, modified)
+        with self.__lock:
+            self.__templates[key] = template
+            self.__templates.move_to_end(key)
+            while len(self.__templates) > self.__max_templates:
+                self.__templates.popitem(last=False)
+        return template
+
+    def forget(self, file_path: str) -> None:
+        """
+        Remove the template at `file_path` from the cache, if it is there.
+        """
+        with self.__lock:
+            self.__templates.pop(os.path.abspath(file_path), None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__templates.clear()
+
+    @staticmethod
+    def _parsed_json(template: Template) -> dict:
+        parsed_json = {key: copy_json(value) for key, value in template.parsed_json.items() if key != "targets"}
+        parsed_json["targets"] = template.parsed_json["targets"]
+        return parsed_json
+
+    @staticmethod
+    def _read(file_path: str, modified: tuple[int, int]) -> Template:
+        with open(file_path, mode="rb") as file:
+            data = file.read()
+
+        with zipfile.ZipFile(io.BytesIO(data), "r") as archive:
+            parsed_json = get_json_backend().loads(archive.read("project.json"))
+        return Template(modified, data, parsed_json)
+
+# The cache shared by everything in this process that forks templates through `fork`
+DEFAULT_TEMPLATE_CACHE = TemplateCache()
+
+def fork(file_path: str, **project_options) -> Project:
+    """
+    Return a new `Project` based on the template at `file_path`, cached for the whole process; see `TemplateCache.fork`.
+    """
+    return DEFAULT_TEMPLATE_CACHE.fork(file_path, **project_options)
@@ -15,15 +15,14 @@ class VariableManager(Searchable):
         name = str(name)
 
         # Check the stage's variables for global variables also
-        for var in self.__variables:
-            if var.name == name:
-                raise ValueError(f"Variable {name} already exists.")
+        if self.by_name(name):
+            raise ValueError(f"Variable {name} already exists.")
         
         if type(value) not in (int, float, str):
             raise TypeError(f"Error creating variable {name}: variable value must be numerical or string-typed, but {value} of type {type(value)} was received.")
 
-        self.__variables.append(Variable(
-                VariableManager.generate_id(), 
+        self._add(Variable(
+                self._generate_id(), 
                 [name, value]
             )
         )
@@ -32,13 +31,14 @@ class VariableManager(Searchable):
         """
         Removes a variable from a target. Raises a warning if the variable does not exist.
         """
-        match = [v for v in self.__variables if v.name == name]
-        if match:
-            self.__variables.remove(match[0])
+        if (match := self.by_name(name)):
+            self._remove(match[0])
         else:
             raise Warning(f"Could not delete variable {name}: variable does not exist.")
 
 class Variable(IDObject):
+    __slots__ = ("__name", "__value")
+
     def __init__(self, id_, values: list) -> None:
         super().__init__(id_)
         self.__name = values[0]
@@ -50,6 +50,17 @@ class Variable(IDObject):
         The name of the variable.
         """
         return self.__name
+
+    @name.setter
+    def name(self, value: str):
+        if type(value) is not str:
+            raise TypeError(f"Variable name must be a string, but {value} of type {type(value)} was received.")
+
+        old_name = self.__name
+        self.__name = value
+        if self._manager is not None:
+            self._manager._renamed(self, old_name)
+        self._changed()
     
     @property
     def value(self) -> int | float | str:
@@ -11,5 +11,8 @@ setup(
     author_email="fr13drice69420@gmail.com",
     license="MIT",
     packages=["kurt3"],
+    extras_require={
+        "fast": ["orjson"]
+    },
     zip_safe=False
 )
\ No newline at end of file
@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from kurt3.project import ASSETS_PATH, Project
+
+BLANK_PROJECT = os.path.join(ASSETS_PATH, "Blank Project.sb3")
+VARIABLE_ID = "`jEk@4|i[#Fk?(8x)AV.-my variable" # The stage's variable in the blank project
+
+def script_blocks() -> dict:
+    """
+    A script using each kind of input: a green flag hat, then an if-block with a condition reporter and a
+    substack of two blocks, a say-block with a reporter over a shadow, and a set-variable block.
+    """
+    return {
+        "hat": {"opcode": "event_whenflagclicked", "next": "if", "parent": None, "inputs": {}, "fields": {}, "shadow": False, "topLevel": True, "x": 10, "y": 20},
+        "if": {"opcode": "control_if", "next": "say", "parent": "hat", "inputs": {"CONDITION": [2, "gt"], "SUBSTACK": [2, "move"]}, "fields": {}, "shadow": False, "topLevel": False},
+        "gt": {"opcode": "operator_gt", "next": None, "parent": "if", "inputs": {"OPERAND1": [1, [10, "1"]], "OPERAND2": [1, [10, "2"]]}, "fields": {}, "shadow": False, "topLevel": False},
+        "move": {"opcode": "motion_movesteps", "next": "turn", "parent": "if", "inputs": {"STEPS": [1, [4, "10"]]}, "fields": {}, "shadow": False, "topLevel": False},
+        "turn": {"opcode": "motion_turnright", "next": None, "parent": "move", "inputs": {"DEGREES": [1, [4, "15"]]}, "fields": {}, "shadow": False, "topLevel": False},
+        "say": {"opcode": "looks_say", "next": "set", "parent": "if", "inputs": {"MESSAGE": [3, "xpos", [10, "Hello!"]]}, "fields": {}, "shadow": False, "topLevel": False},
+        "xpos": {"opcode": "motion_xposition", "next": None, "parent": "say", "inputs": {}, "fields": {}, "shadow": False, "topLevel": False},
+        "set": {"opcode": "data_setvariableto", "next": None, "parent": "say", "inputs": {"VALUE": [1, [10, "0"]]}, "fields": {"VARIABLE": ["my variable", VARIABLE_ID]}, "shadow": False, "topLevel": False},
+    }
+
+def make_project(sprites: int = 2, monitor: bool = False) -> bytes:
+    """
+    The blank project, with `sprites` sprites that each hold `script_blocks`, sharing their block IDs
+    as duplicated sprites do in Scratch, and optionally a monitor showing the stage's variable.
+    """
+    with zipfile.ZipFile(BLANK_PROJECT) as blank:
+        members = {name: blank.read(name) for name in blank.namelist()}
+    project_json = json.loads(members["project.json"])
+    stage, sprite = project_json["targets"]
+    project_json["targets"] = [stage]
+    for i in range(sprites):
+        project_json["targets"].append(sprite | {"name": f"Sprite{i + 1}", "layerOrder": i + 1, "blocks": script_blocks()})
+    if monitor:
+        project_json["monitors"].append({
+            "id": VARIABLE_ID, "mode": "default", "opcode": "data_variable", "params": {"VARIABLE": "my variable"},
+            "spriteName": None, "value": 0, "width": 0, "height": 0, "x": 5, "y": 5, "visible": True,
+            "sliderMin": 0, "sliderMax": 100, "isDiscrete": True,
+        })
+    members["project.json"] = json.dumps(project_json).encode()
+
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, member in members.items():
+            archive.writestr(name, member)
+    return data.getvalue()
+
+def dangling_ids(project_json: dict) -> list[tuple[str, str]]:
+    """
+    Every (target name, block ID) that some block refers to without the block existing in that target.
+    """
+    dangling = []
+    for target in project_json["targets"]:
+        blocks = target["blocks"]
+        for block in blocks.values():
+            referred = [block["next"], block["parent"]]
+            for value in block["inputs"].values():
+                referred.extend(v for v in value[1:] if type(v) is str)
+            dangling.extend((target["name"], id) for id in referred if id is not None and id not in blocks)
+    return dangling
+
+@pytest.fixture
+def project_data() -> bytes:
+    return make_project()
+
+@pytest.fixture(params=["objects", "table"])
+def block_storage(request) -> str:
+    return request.param
+
+@pytest.fixture
+def project(project_data, block_storage):
+    project = Project(project_data, block_storage=block_storage).open()
+    yield project
+    project.close()
@@ -0,0 +1,24 @@
+import zipfile
+
+from kurt3.batch import run_batch
+from kurt3.project import Project
+
+def add_sprite(project: Project) -> None:
+    project.create_sprite("Added")
+
+def test_batch_reports_each_project(tmp_path, project_data):
+    good = tmp_path / "in" / "good.sb3"
+    broken = tmp_path / "in" / "broken.sb3"
+    good.parent.mkdir()
+    good.write_bytes(project_data)
+    with zipfile.ZipFile(broken, "w") as archive:
+        archive.writestr("other.txt", b"")
+
+    results = run_batch([str(good), str(broken)], add_sprite, str(tmp_path / "out"), max_workers=2)
+    assert [r.input_path for r in results] == [str(good), str(broken)]
+    assert results[0].ok and results[0].output_size > 0
+    assert not results[1].ok and "KeyError" in results[1].error
+
+    with Project(results[0].output_path) as project:
+        names = [t.name for t in project.targets]
+    assert names == ["Stage", "Sprite1", "Sprite2", "Added"]
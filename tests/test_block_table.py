@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from kurt3.block import TopLevelBlock
+from kurt3.project import Project
+from tests.test_output_cache import MUTATIONS
+
+def open_both(project_data) -> tuple[Project, Project]:
+    return tuple(Project(project_data, block_storage=s, deterministic=True).open() for s in ("objects", "table"))
+
+def save(project: Project) -> bytes:
+    saved = io.BytesIO()
+    project.save(saved)
+    return saved.getvalue()
+
+def test_unknown_storage():
+    with pytest.raises(ValueError):
+        Project(b"", block_storage="columns")
+
+@pytest.mark.parametrize("mutation", [None, *MUTATIONS.values()], ids=["unchanged", *MUTATIONS.keys()])
+def test_table_saves_the_same_as_objects(project_data, mutation):
+    objects, table = open_both(project_data)
+    try:
+        if mutation is not None:
+            mutation(objects)
+            mutation(table)
+        assert table.output() == objects.output()
+        assert save(table) == save(objects)
+    finally:
+        objects.close()
+        table.close()
+
+def test_table_answers_queries_the_same(project_data):
+    objects, table = open_both(project_data)
+    try:
+        a, b = (p.get_sprite_by_name("Sprite1").blocks for p in (objects, table))
+        assert table.opcode_counts() == objects.opcode_counts()
+        assert b.ids_by_opcode("motion_turnright") == a.ids_by_opcode("motion_turnright")
+        assert [x._id for x in b.top_level_blocks] == [x._id for x in a.top_level_blocks]
+        for id in ("hat", "if", "say"):
+            assert [x._id for x in b.children(id)] == [x._id for x in a.children(id)]
+            assert list(b.walk_ids(id)) == list(a.walk_ids(id))
+
+        for blocks in (a, b):
+            blocks.by_id("move").set_next(blocks.by_id("xpos"))
+        assert [x._id for x in b.children("move")] == [x._id for x in a.children("move")] == ["xpos"]
+        assert [x._id for x in b.children("say")] == [x._id for x in a.children("say")] == ["set"]
+    finally:
+        objects.close()
+        table.close()
+
+def test_opcode_lookups_follow_added_and_removed_blocks(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    added = [sprite.add_block(TopLevelBlock(
+        project.generate_id(), opcode="motion_turnright", _next=None, parent=None,
+        inputs={"DEGREES": [1, [4, "15"]]}, fields={},
+    )) for _ in range(3)]
+    sprite.remove_block([sprite.blocks.by_id("turn"), added[1]])
+
+    expected = [added[0]._id, added[2]._id]
+    assert sprite.blocks.ids_by_opcode("motion_turnright") == expected
+    assert [b._id for b in sprite.blocks.by_opcode("motion_turnright")] == expected
+    assert sprite.blocks.opcode_counts()["motion_turnright"] == 2
+    sprite.remove_block(sprite.blocks.by_id("xpos"))
+    assert sprite.blocks.ids_by_opcode("motion_xposition") == sprite.blocks.by_opcode("motion_xposition") == []
@@ -0,0 +1,60 @@
+from tests.conftest import dangling_ids
+
+def test_removing_substack_block_clears_input(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    sprite.remove_block(sprite.blocks.by_id("move"))
+
+    output = project.output()
+    assert dangling_ids(output) == []
+    assert "SUBSTACK" not in output["targets"][1]["blocks"]["if"]["inputs"]
+    assert [b._id for b in sprite.blocks.by_id("if").children] == ["gt", "say"]
+    assert "turn" not in sprite.blocks
+
+def test_removing_reporter_falls_back_to_shadow(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    sprite.remove_block(sprite.blocks.by_id("xpos"))
+
+    output = project.output()
+    assert dangling_ids(output) == []
+    assert output["targets"][1]["blocks"]["say"]["inputs"]["MESSAGE"] == [1, [10, "Hello!"]]
+    assert sprite.blocks.by_id("say").children[0]._id == "set"
+
+def test_removing_condition_after_reading_inputs(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    if_block = sprite.blocks.by_id("if")
+    assert "CONDITION" in if_block.inputs
+    before = if_block.output()
+    sprite.remove_block(sprite.blocks.by_id("gt"))
+
+    assert "CONDITION" not in if_block.inputs
+    assert "CONDITION" in before["inputs"] # Output handed out earlier is left alone
+    assert dangling_ids(project.output()) == []
+
+def test_removing_next_block(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    sprite.remove_block(sprite.blocks.by_id("say"))
+
+    assert sprite.blocks.by_id("if").next is None
+    assert dangling_ids(project.output()) == []
+    assert project.opcode_counts()["looks_say"] == 1 # Only Sprite2's is left
+
+def test_set_next_moves_block_out_of_input(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    turn = sprite.blocks.by_id("turn")
+    turn.remove_next()
+    turn.set_next(sprite.blocks.by_id("xpos"))
+
+    assert sprite.blocks.by_id("xpos").parent is turn
+    assert [b._id for b in sprite.blocks.by_id("say").children] == ["set"]
+    assert dangling_ids(project.output()) == []
+
+def test_walk_and_opcode_index(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    hat = sprite.blocks.by_id("hat")
+    assert [b._id for b in hat.walk()] == ["hat", "if", "gt", "move", "turn", "say", "xpos", "set"]
+    assert list(sprite.blocks.walk_ids(hat)) == [b._id for b in hat.walk()]
+
+    sprite.remove_block(sprite.blocks.by_id("if"))
+    assert list(sprite.blocks) == [hat]
+    assert sprite.blocks.by_opcode("motion_movesteps") == []
+    assert dangling_ids(project.output()) == []
@@ -0,0 +1,67 @@
+import pytest
+
+from kurt3.ids import CounterIDGenerator, IDGenerator, IDRegistry, RandomIDGenerator
+from kurt3.project import Project
+from tests.conftest import script_blocks
+
+def test_generator_must_implement_generate_body():
+    class Incomplete(IDGenerator):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_generated_ids_keep_their_prefix_and_length():
+    for generator in (RandomIDGenerator(seed=1, prefix="a-"), CounterIDGenerator(prefix="a-")):
+        id = generator.generate(8)
+        assert id.startswith("a-") and len(id) == 8
+
+def test_seeded_and_counted_ids_repeat():
+    assert RandomIDGenerator(seed=3).generate() == RandomIDGenerator(seed=3).generate()
+    assert [CounterIDGenerator().generate(3) for i in range(2)] == ["!!!", "!!!"]
+
+def test_registry_counts_users_of_each_id():
+    registry = IDRegistry()
+    registry.add("a")
+    registry.add("a")
+    registry.discard("a")
+    assert "a" in registry
+    registry.discard("a")
+    assert "a" not in registry
+
+def test_generated_id_is_reserved_until_used():
+    registry = IDRegistry(CounterIDGenerator())
+    id = registry.generate_id(3)
+    assert id in registry and registry.generate_id(3) != id
+    registry.add(id)
+    registry.discard(id)
+    assert id not in registry
+
+def test_id_shared_by_two_targets_stays_in_use(project):
+    ids = project._Project__ids
+    first, second = project.get_sprite_by_name("Sprite1"), project.get_sprite_by_name("Sprite2")
+    first.remove_block(first.blocks.by_id("move"))
+    assert "move" in ids and "turn" in ids
+
+    second.remove_block(second.blocks.by_id("move"))
+    assert "move" not in ids and "turn" not in ids
+    assert "hat" in ids
+    project.remove_sprite(first)
+    assert "hat" in ids
+    project.remove_sprite(second)
+    assert "hat" not in ids
+
+def test_generated_ids_avoid_those_in_use(project_data):
+    class Replaying(IDGenerator):
+        # Offers every ID already in the project before a new one
+        def __init__(self) -> None:
+            super().__init__()
+            self.__ids = iter(script_blocks())
+
+        def _generate_body(self, l: int) -> str:
+            return next(self.__ids, "fresh")
+
+    project = Project(project_data, id_generator=Replaying()).open()
+    try:
+        assert project.generate_id() == "fresh"
+    finally:
+        project.close()
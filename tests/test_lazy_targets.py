@@ -0,0 +1,81 @@
+import copy
+import io
+import json
+import zipfile
+
+import pytest
+
+from kurt3.project import Project
+from kurt3.target import RawTarget
+from kurt3.templates import TemplateCache
+from tests.test_output_cache import MUTATIONS
+
+def raw_targets(project: Project) -> list[RawTarget]:
+    return [t for t in project.targets._TargetManager__targets if isinstance(t, RawTarget)]
+
+def save(project: Project) -> tuple[list[str], dict]:
+    saved = io.BytesIO()
+    project.save(saved)
+    with zipfile.ZipFile(saved) as archive:
+        return archive.namelist(), json.loads(archive.read("project.json"))
+
+@pytest.mark.parametrize("mutation", [None, *MUTATIONS.values()], ids=["unchanged", *MUTATIONS.keys()])
+def test_lazy_output_matches_eager_output(project_data, block_storage, mutation):
+    lazy = Project(project_data, block_storage=block_storage, deterministic=True).open()
+    eager = Project(project_data, block_storage=block_storage, deterministic=True).open()
+    try:
+        list(eager.targets)
+        if mutation is not None:
+            mutation(lazy)
+            mutation(eager)
+        assert lazy.output() == eager.output()
+        # Untouched targets keep the key order they were parsed with, so only the content is the same
+        assert save(lazy) == save(eager)
+    finally:
+        lazy.close()
+        eager.close()
+
+def test_untouched_targets_stay_as_parsed(project):
+    sprite = project.get_sprite_by_name("Sprite2")
+    sprite.x = 10
+    project.save(io.BytesIO())
+    assert [t.name for t in raw_targets(project)] == ["Stage", "Sprite1"]
+
+    counts = project.opcode_counts()
+    assert [b._id for b in project.blocks_by_opcode("looks_say")] == ["say", "say"]
+    assert project.opcode_counts() == counts
+    assert [t.name for t in raw_targets(project)] == ["Stage"]
+
+def test_raw_target_is_saved_verbatim(project):
+    raw = raw_targets(project)[1]
+    assert project.output()["targets"][1] is raw.values
+    project.targets.go_to_back(project.get_sprite_by_name("Sprite2"))
+    assert project.output()["targets"][1] == raw.values | {"layerOrder": 2}
+    assert raw.values["layerOrder"] == 1 # The parsed target itself is left alone
+
+def test_forks_do_not_share_changes(tmp_path, project_data):
+    path = tmp_path / "template.sb3"
+    path.write_bytes(project_data)
+    cache = TemplateCache()
+    template = cache.get(str(path))
+    before = template.parsed_json["targets"][1]["blocks"]["hat"].copy()
+
+    first = cache.fork(str(path)).open()
+    second = cache.fork(str(path)).open()
+    try:
+        sprite = first.get_sprite_by_name("Sprite1")
+        sprite.blocks.by_id("hat").set_next(sprite.blocks.by_id("say"))
+        sprite.name = "Hero"
+        assert second.output()["targets"][1]["name"] == "Sprite1"
+        assert second.output()["targets"][1]["blocks"]["hat"]["next"] == "if"
+        assert template.parsed_json["targets"][1]["blocks"]["hat"] == before
+    finally:
+        first.close()
+        second.close()
+
+def test_building_a_target_leaves_earlier_output_alone(project):
+    output = project.output()
+    before = copy.deepcopy(output)
+    project.targets.go_to_back(project.get_sprite_by_name("Sprite2"))
+    list(project.targets)
+    assert output == before
@@ -0,0 +1,49 @@
+import pytest
+
+from kurt3.project import Project
+from tests.conftest import VARIABLE_ID
+
+def sprite(project):
+    return project.get_sprite_by_name("Sprite1")
+
+def add_costume(project):
+    project.add_costume(sprite(project), b"<svg xmlns='http://www.w3.org/2000/svg'/>", "blank", "svg")
+
+MUTATIONS = {
+    "rename sprite": lambda p: setattr(sprite(p), "name", "Hero"),
+    "move sprite": lambda p: setattr(sprite(p), "x", 50),
+    "move script": lambda p: setattr(sprite(p).blocks.by_id("hat"), "x", 100),
+    "remove block": lambda p: sprite(p).remove_block(sprite(p).blocks.by_id("turn")),
+    "remove input block": lambda p: sprite(p).remove_block(sprite(p).blocks.by_id("xpos")),
+    "set next": lambda p: sprite(p).blocks.by_id("turn").set_next(sprite(p).blocks.by_id("xpos")),
+    "rename variable": lambda p: p.rename(p.stage.variables.by_id(VARIABLE_ID), "score"),
+    "add costume": add_costume,
+    "change layer": lambda p: p.targets.go_to_front(sprite(p)),
+}
+
+@pytest.mark.parametrize("mutation", MUTATIONS.values(), ids=MUTATIONS.keys())
+def test_cached_output_matches_fresh_output(project_data, block_storage, mutation):
+    warm = Project(project_data, block_storage=block_storage).open()
+    fresh = Project(project_data, block_storage=block_storage).open()
+    try:
+        # Every target is built and its output cached before the change
+        list(warm.targets)
+        before = warm.output()
+        mutation(warm)
+        mutation(fresh)
+        assert warm.output() == fresh.output()
+        assert warm.output() != before
+    finally:
+        warm.close()
+        fresh.close()
+
+def test_unchanged_output_is_reused(project):
+    first = sprite(project)
+    first_output = first.output()
+    block_output = first.blocks.by_id("move").output()
+    assert first.output() is first_output
+    assert first.blocks.by_id("move").output() is block_output
+
+    first.blocks.by_id("hat").x = 30
+    assert first.output() is not first_output
+    assert first.blocks.by_id("move").output() is block_output
@@ -0,0 +1,127 @@
+import io
+import zipfile
+
+import pytest
+
+from kurt3.project import Project
+from tests.conftest import script_blocks
+
+@pytest.mark.parametrize("source", ["path", "pathlike", "bytes", "stream"])
+def test_sources_open(tmp_path, project_data, source):
+    path = tmp_path / "project.sb3"
+    path.write_bytes(project_data)
+    given = {"path": str(path), "pathlike": path, "bytes": project_data, "stream": io.BytesIO(project_data)}[source]
+
+    project = Project(given).open()
+    try:
+        assert set(project.get_sprite_by_name("Sprite1").output()["blocks"]) == set(script_blocks())
+        assert project.read_asset("83c36d806dc92327b9e7049a565c6bff.wav")
+        project.save(tmp_path / "saved.sb3")
+    finally:
+        project.close()
+    assert zipfile.ZipFile(tmp_path / "saved.sb3").testzip() is None
+
+def test_unsupported_source():
+    with pytest.raises(TypeError):
+        Project(42)
+    with pytest.raises(FileNotFoundError):
+        Project("missing.sb3")
+
+def test_deterministic_save_is_byte_identical(project_data):
+    saves = []
+    for i in range(2):
+        project = Project(project_data, deterministic=True).open()
+        sprite = project.create_sprite("New")
+        project.add_costume(sprite, b"<svg xmlns='http://www.w3.org/2000/svg'/>", "blank", "svg")
+        saved = io.BytesIO()
+        project.save(saved)
+        project.close()
+        saves.append(saved.getvalue())
+    assert saves[0] == saves[1]
+
+def test_reopening_starts_afresh(project_data):
+    project = Project(project_data).open()
+    sprite = project.create_sprite("New")
+    project.add_costume(sprite, b"<svg xmlns='http://www.w3.org/2000/svg'/>", "blank", "svg")
+    reserved = project.generate_id()
+    project.close()
+
+    project.open()
+    try:
+        assert reserved not in project._Project__ids
+        assert project._asset_data == {}
+        with pytest.raises(NameError):
+            project.get_sprite_by_name("New")
+        saved = io.BytesIO()
+        report = project.save(saved, prune=False)
+    finally:
+        project.close()
+    assert report.dropped == []
+    assert len(zipfile.ZipFile(saved).namelist()) == 6 # project.json and the blank project's five assets
+
+def test_open_twice_raises(project_data):
+    project = Project(project_data).open()
+    with pytest.raises(IOError):
+        project.open()
+    project.close()
+    project.close() # Closing again does nothing
+
+def test_pruning_reports_uncompressed_sizes(project_data):
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'/>"
+    project = Project(project_data).open()
+    try:
+        sprite = project.get_sprite_by_name("Sprite1")
+        project.add_costume(sprite, svg, "blank", "svg")
+        # There is no way to remove costumes and sounds yet, so they are taken out of their lists directly
+        sprite.costumes.costumes.pop()
+        project.stage.sounds.sounds.pop(0)
+        report = project.save(io.BytesIO())
+    finally:
+        project.close()
+
+    with zipfile.ZipFile(io.BytesIO(project_data)) as original:
+        pop = original.getinfo("83a9787d4cb6f3b7632b4ddfebf74367.wav").file_size
+    assert len(report.dropped) == 2
+    assert report.bytes_saved == pop + len(svg)
+
+def test_failed_open_leaves_project_closed():
+    broken = io.BytesIO()
+    with zipfile.ZipFile(broken, "w") as archive:
+        archive.writestr("other.txt", b"")
+    project = Project(broken)
+    for i in range(2):
+        with pytest.raises(KeyError):
+            project.open()
+        assert project.closed
+
+def test_deterministic_save_does_not_depend_on_system(project_data, monkeypatch):
+    def save() -> bytes:
+        project = Project(project_data, deterministic=True).open()
+        try:
+            saved = io.BytesIO()
+            project.save(saved)
+        finally:
+            project.close()
+        return saved.getvalue()
+
+    here = save()
+    original_init = zipfile.ZipInfo.__init__
+    def made_on_windows(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.create_system = 0 # As zipfile records members made on Windows
+    monkeypatch.setattr(zipfile.ZipInfo, "__init__", made_on_windows)
+    assert save() == here
+    assert {i.create_system for i in zipfile.ZipFile(io.BytesIO(here)).infolist()} == {3}
+
+def test_assets_added_from_path_objects(tmp_path, project_data):
+    svg = tmp_path / "blank.svg"
+    svg.write_bytes(b"<svg xmlns='http://www.w3.org/2000/svg'/>")
+    project = Project(project_data).open()
+    try:
+        sprite = project.get_sprite_by_name("Sprite1")
+        project.add_costume(sprite, svg, "from path")
+        project.add_costume(sprite, str(svg), "from string")
+        first, second = sprite.costumes.costumes[-2:]
+        assert first.output() == second.output() | {"name": "from path"}
+    finally:
+        project.close()
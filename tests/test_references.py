@@ -0,0 +1,63 @@
+import copy
+
+from kurt3.block import TopLevelBlock
+from kurt3.project import Project
+from tests.conftest import VARIABLE_ID, make_project
+
+def test_usages_follow_block_removal(project):
+    variable = project.stage.variables.by_id(VARIABLE_ID)
+    assert sorted(b._id for b in project.find_usages(variable)) == ["set", "set"]
+
+    sprite = project.get_sprite_by_name("Sprite1")
+    set_block = sprite.blocks.by_id("set")
+    sprite.remove_block(set_block)
+    assert set_block not in project.find_usages(variable)
+    assert len(project.find_usages(variable)) == 1
+
+def test_rename_updates_every_user(project):
+    variable = project.stage.variables.by_id(VARIABLE_ID)
+    before = project.output()
+    project.rename(variable, "score")
+
+    output = project.output()
+    assert output["targets"][0]["variables"][VARIABLE_ID][0] == "score"
+    for target in output["targets"][1:]:
+        assert target["blocks"]["set"]["fields"]["VARIABLE"] == ["score", VARIABLE_ID]
+    assert output != before
+
+def test_sprites_added_and_removed_later(project):
+    variable = project.stage.variables.by_id(VARIABLE_ID)
+    project.references # Built before the sprites change
+    project.remove_sprite(project.get_sprite_by_name("Sprite2"))
+    assert len(project.find_usages(variable)) == 1
+
+    sprite = project.create_sprite("New")
+    block = sprite.add_block(TopLevelBlock(
+        project.generate_id(), opcode="data_changevariableby", _next=None, parent=None,
+        inputs={"VALUE": [1, [4, "1"]]}, fields={"VARIABLE": ["my variable", VARIABLE_ID]},
+    ))
+    assert block in project.find_usages(variable)
+    project.rename(variable, "score")
+    assert sprite.output()["blocks"][block._id]["fields"]["VARIABLE"][0] == "score"
+
+def test_rename_leaves_earlier_output_alone(block_storage):
+    project = Project(make_project(monitor=True), block_storage=block_storage).open()
+    try:
+        sprite = project.get_sprite_by_name("Sprite1")
+        block = sprite.add_block(TopLevelBlock(
+            project.generate_id(), opcode="looks_say", _next=None, parent=None,
+            inputs={"MESSAGE": [3, [12, "my variable", VARIABLE_ID], [10, "Hello!"]]}, fields={},
+        ))
+        sprite.blocks.by_id("set").fields # Renamed through its `FieldsManager` rather than its parsed fields
+        before = project.output()
+        copied = copy.deepcopy(before)
+        project.rename(project.stage.variables.by_id(VARIABLE_ID), "score")
+
+        assert before == copied
+        output = project.output()
+        assert output["targets"][1]["blocks"][block._id]["inputs"]["MESSAGE"] == [3, [12, "score", VARIABLE_ID], [10, "Hello!"]]
+        assert output["targets"][1]["blocks"]["set"]["fields"]["VARIABLE"] == ["score", VARIABLE_ID]
+        assert output["targets"][2]["blocks"]["set"]["fields"]["VARIABLE"] == ["score", VARIABLE_ID]
+        assert output["monitors"][0]["params"] == {"VARIABLE": "score"}
+    finally:
+        project.close()
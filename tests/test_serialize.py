@@ -0,0 +1,42 @@
+import io
+import zipfile
+
+import pytest
+
+from kurt3.archive import NO_COMPRESSION, CompressionPolicy
+from kurt3.project import Project
+from kurt3.serialize import JSONBackend, StdlibJSON, get_json_backend
+
+def test_backend_must_implement_loads_and_dumps():
+    with pytest.raises(TypeError):
+        JSONBackend()
+
+    class LoadsOnly(JSONBackend):
+        def loads(self, data):
+            return None
+    with pytest.raises(TypeError):
+        LoadsOnly()
+
+@pytest.mark.parametrize("backend", ["json", StdlibJSON()])
+def test_no_backend_can_be_chosen_in_deterministic_mode(backend):
+    with pytest.raises(ValueError):
+        get_json_backend(backend, deterministic=True)
+
+def test_backend_instance_is_used_as_given():
+    backend = StdlibJSON()
+    assert get_json_backend(backend) is backend
+
+@pytest.mark.parametrize("policy, compress_type", [
+    (NO_COMPRESSION, zipfile.ZIP_STORED),
+    (CompressionPolicy({"json": (zipfile.ZIP_DEFLATED, 9)}), zipfile.ZIP_DEFLATED),
+])
+def test_project_json_follows_compression_policy(project_data, policy, compress_type):
+    with Project(project_data) as project:
+        expected = project.output()
+        saved = io.BytesIO()
+        project.save(saved, compression=policy)
+
+    with zipfile.ZipFile(saved) as archive:
+        assert archive.getinfo("project.json").compress_type == compress_type
+        assert archive.testzip() is None
+        assert StdlibJSON().loads(archive.read("project.json")) == expected
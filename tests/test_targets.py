@@ -0,0 +1,49 @@
+import pytest
+
+from kurt3.project import Project
+from tests.conftest import make_project
+
+def layer_orders(project) -> dict[str, int]:
+    return {t["name"]: t["layerOrder"] for t in project.output()["targets"]}
+
+def test_renamed_sprite_is_found_by_its_new_name(project):
+    sprite = project.get_sprite_by_name("Sprite1")
+    sprite.name = "Hero"
+    assert project.get_sprite_by_name("Hero") is sprite
+    with pytest.raises(NameError):
+        project.get_sprite_by_name("Sprite1")
+
+def test_layers_stay_numbered_by_position(project):
+    first = project.get_sprite_by_name("Sprite1")
+    new = project.create_sprite("New")
+    assert layer_orders(project) == {"Stage": 0, "Sprite1": 1, "Sprite2": 2, "New": 3}
+
+    project.targets.go_to_back(new)
+    assert layer_orders(project) == {"Stage": 0, "Sprite1": 2, "Sprite2": 3, "New": 1}
+    project.targets.move_layers(first, 10)
+    assert [t.name for t in project.targets.layers] == ["Stage", "New", "Sprite2", "Sprite1"]
+
+    project.remove_sprite(new)
+    assert layer_orders(project) == {"Stage": 0, "Sprite1": 2, "Sprite2": 1}
+    assert all(t.layer == i for i, t in enumerate(project.targets.layers))
+    assert project.targets.highest_layer == 2
+
+def test_sprite_names_are_unique(project):
+    with pytest.raises(ValueError):
+        project.create_sprite("Sprite2")
+    sprite = project.get_sprite_by_name("Sprite2")
+    project.remove_sprite(sprite)
+    with pytest.raises(NameError):
+        project.remove_sprite(sprite)
+
+def test_only_this_projects_sprites_change_layer(project):
+    with pytest.raises(NameError):
+        project.targets.move_layers(project.stage, 1)
+    other = Project(make_project(sprites=4)).open()
+    try:
+        for name in ("Sprite1", "Sprite4"):
+            with pytest.raises(NameError):
+                project.targets.go_to_front(other.get_sprite_by_name(name))
+    finally:
+        other.close()
+    assert [t.name for t in project.targets.layers] == ["Stage", "Sprite1", "Sprite2"]